@@ -1,4 +1,15 @@
-from .ui import SetupUI
 from .benchmark_setup import DistType, MoveType, LOSType, BenchmarkSetup
+from .graph_setup import GraphBenchmarkSetup
 
-__all__ = ["SetupUI", "DistType", "MoveType", "LOSType", "BenchmarkSetup"]
\ No newline at end of file
+__all__ = ["SetupUI", "HeadlessSetupUI", "DistType", "MoveType", "LOSType", "BenchmarkSetup", "GraphBenchmarkSetup"]
+
+
+def __getattr__(name: str):
+    """ Defers the UI imports (and with them rich) until a UI is actually requested. """
+    if name == "SetupUI":
+        from .ui import SetupUI
+        return SetupUI
+    if name == "HeadlessSetupUI":
+        from .headless import HeadlessSetupUI
+        return HeadlessSetupUI
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,15 +1,17 @@
-from configuration.benchmark_setup import BenchmarkSetup, WriterArgs
-from multiprocessing import Process
+import argparse
+import os
+from configuration.benchmark_setup import BenchmarkSetup, Job
+from configuration.graph_setup import GraphBenchmarkSetup
+from multiprocessing import Process, Pipe
 from typing import Any
-from configuration.ui import SetupUI
 
-def main() -> list[WriterArgs]:
+def main() -> list[Job]:
     """
     This method exists only as an access point to control the configuration of the scenario builder.
     First, it sets up the directory structure. Then, the user can define sizes and parameters. Then,
-    it returns a list of jobs to run. We return a list of jobs, because generating the configs can
-    actually take quite a long time without multithreading support. The multithreading support is
-    baked into the module itself at the bottom of this file.
+    it returns a list of jobs to run, each a callable with its writer arguments. We return a list of jobs,
+    because generating the configs can actually take quite a long time without multithreading support.
+    The multithreading support is baked into the module itself at the bottom of this file.
     """
     BenchmarkSetup.set_up_benchmark_dirs()
 
@@ -20,6 +22,10 @@ def main() -> list[WriterArgs]:
     # --- Configure Writer kwargs ---
     writer_args: dict[str, Any] = {
         'random_seed': 42,
+        'num_workers': 1, # Processes per scenario. Output is identical for any value.
+        'write_references': True, # Pair digests for static no-los scenarios. Takes minutes at xl.
+        'spatial_order': "none", # Entity order in the files: "none" (generation order), "morton" or "hilbert".
+        'compression': "none", # Geometry scenario files: "none" (plain JSON), "gzip", "lzma" or "bz2", in chunks.
 
     # --- Parameterized Agent Data ---
         'targets_per_sensor': 5,
@@ -27,26 +33,78 @@ def main() -> list[WriterArgs]:
         'fov': 60,
         'view_range': 10,
 
+    # --- Sensor classes of the mixed sensor scenarios (fractions of the agents) ---
+        'sensor_mix': [
+            {'fraction': 0.9, 'fov': 90, 'view_range': 10},
+            {'fraction': 0.1, 'fov': 20, 'view_range': 40},
+        ],
+
     # --- Parameterized Occluder Data ---
         'scale': 0.1,
         'shape': "cube",
         'occ_per_agent': 10,
+
+    # --- Parameterized Graph Data ---
+        'weapon_fraction': 0.5,
+        'neighbors_per_node': 6,
+        'link_range': 10,
+        'terminal_fraction': 0.01,
+        'routing_sources': 64,
     }
 
-    job_list = BenchmarkSetup.generate_geometric_benchmark_jobs(sim_sizes, writer_args)
+    geometric_jobs = BenchmarkSetup.generate_geometric_benchmark_jobs(sim_sizes, writer_args)
+    mixed_sensor_jobs = BenchmarkSetup.generate_mixed_sensor_jobs(sim_sizes, writer_args)
+    wta_jobs = GraphBenchmarkSetup.generate_wta_benchmark_jobs(sim_sizes, writer_args)
+    supply_jobs = GraphBenchmarkSetup.generate_supply_benchmark_jobs(sim_sizes, writer_args)
+    routing_jobs = GraphBenchmarkSetup.generate_routing_benchmark_jobs(sim_sizes, writer_args)
+    job_list = ([(BenchmarkSetup.process_objects, job) for job in geometric_jobs] +
+                [(BenchmarkSetup.process_objects, job) for job in mixed_sensor_jobs] +
+                [(GraphBenchmarkSetup.process_wta, job) for job in wta_jobs] +
+                [(GraphBenchmarkSetup.process_supply, job) for job in supply_jobs] +
+                [(GraphBenchmarkSetup.process_routing, job) for job in routing_jobs])
     return job_list
 
 
+def parse_args() -> argparse.Namespace:
+    """ Parses the command line arguments of the generator. """
+    parser = argparse.ArgumentParser(prog="python -m configuration", description="Generates the benchmark scenarios.")
+    parser.add_argument("--no-ui", action="store_true", help="Print plain progress lines instead of the rich UI.")
+    parser.add_argument("--estimate", action="store_true",
+                        help="Print the expected targets per sensor and grid occupancy of every job instead of writing it.")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    process_args = main()
-    num_jobs = len(process_args)
+    # --- The UI is imported here, so spawned children never import rich ---
+    cli_args = parse_args()
+    if cli_args.no_ui:
+        from configuration.headless import HeadlessSetupUI as SetupUI
+    else:
+        from configuration.ui import SetupUI
+
+    jobs = main()
+    num_jobs = len(jobs)
+
+    # --- Estimate mode: check the generator's density before committing to a long run ---
+    if cli_args.estimate:
+        for target, p_arg in jobs:
+            if target is not BenchmarkSetup.process_objects:
+                continue
+            estimate = BenchmarkSetup.estimate_job(**p_arg)
+            print(f"{os.path.basename(p_arg['file_path']):<40} analytic={estimate.analytic_targets:7.3f} "
+                  f"sampled={estimate.sampled_targets:7.3f} (std {estimate.sampled_targets_std:6.3f}) "
+                  f"occupied_cells={estimate.occupied_cells:<7} candidates/query={estimate.mean_candidates_per_query:9.1f}")
+        raise SystemExit(0)
 
-    processes = []
-    for p_arg in process_args:
-        p = Process(target=BenchmarkSetup.process_objects, kwargs=p_arg)
-        processes.append(p)
+    # --- Each generator reports its progress through its own pipe ---
+    workers = dict()
+    for target, p_arg in jobs:
+        receiver, sender = Pipe(duplex=False)
+        p = Process(target=target, kwargs=p_arg | {"progress": sender})
         p.start()
+        sender.close()
+        workers[os.path.basename(p_arg["file_path"])] = (p, receiver)
 
-    ui = SetupUI(num_jobs, processes)
+    ui = SetupUI(num_jobs, workers)
     ui.poll()
     ui.finish()
@@ -1,16 +1,25 @@
 import os
-import random
-from typing import Any, Union
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Union
 from sim_objects.agent import Agent
 from sim_objects.occluder import Occluder
 from sim_objects.base import SimObject
 import copy
 from enum import StrEnum, auto
+from multiprocessing.connection import Connection
 from sim_objects.sensor import SphericalSectorSensor
 from utils.distribution_builder import DistributionBuilder
+from utils.distributions import SpatialDistribution
+from utils.estimation import ScenarioEstimate, SensorMix, as_sensor_mix, estimate_scenario
+from utils.expected import write_expected
+from utils.compression import Codec
+from utils.ordering import SpatialOrder, spatial_sort
+from utils.rng import entity_rng
+from utils.progress import ProgressReporter
 
 
 type WriterArgs = dict[str, Union[str, int]]
+type Job = tuple[Callable[..., None], WriterArgs]
 
 class DistType(StrEnum):
     """ Distribution type. """
@@ -42,6 +51,8 @@ class BenchmarkSetup:
         os.path.join("benchmarks", "geometry", "normal_static_los"),
         os.path.join("benchmarks", "geometry", "normal_dynamic_no_los"),
         os.path.join("benchmarks", "geometry", "normal_dynamic_los"),
+        os.path.join("benchmarks", "geometry", "uniform_mixed_sensors"),
+        os.path.join("benchmarks", "geometry", "normal_mixed_sensors"),
         os.path.join("benchmarks", "graphs", "disjoint_network"),
         os.path.join("benchmarks", "graphs", "pathfinding"),
         os.path.join("benchmarks", "graphs", "network_routing"),
@@ -52,6 +63,13 @@ class BenchmarkSetup:
         os.path.join("benchmarks", "propagation", "contamination")
     ]
 
+    # --- Number of entities generated per work item when a scenario is built in parallel ---
+    chunk_size = 10000
+
+    # --- Writer arguments used by the geometry scenarios ---
+    geometry_keys = ("random_seed", "num_workers", "targets_per_sensor", "speed", "fov", "view_range",
+                     "scale", "shape", "occ_per_agent", "write_references", "spatial_order", "compression")
+
     @staticmethod
     def set_up_benchmark_dirs() -> None:
         """ Sets up the directory structure on the host. """
@@ -65,6 +83,7 @@ class BenchmarkSetup:
         Generates a list of benchmark jobs to run in parallel. Be wary of modifying the hardcoded parameters below
         without corresponding changes to the directory structure.
         """
+        writer_args = {key: writer_args[key] for key in BenchmarkSetup.geometry_keys if key in writer_args}
 
         distributions = [DistType.UNIFORM, DistType.NORMAL]
         movements = [MoveType.STATIC, MoveType.DYNAMIC]
@@ -80,11 +99,32 @@ class BenchmarkSetup:
                         file_path = os.path.join("benchmarks", "geometry", f"{dist}_{move}_{los}", file_name)
                         writer_args["file_path"] = file_path
                         writer_args["los"] = los
+                        writer_args["move"] = move
                         writer_args["dist"] = dist
                         writer_args["num_agents"] = num_agents
                         job_list.append(copy.deepcopy(writer_args))
         return job_list
 
+    @staticmethod
+    def generate_mixed_sensor_jobs(sim_size: dict[str, int], writer_args: WriterArgs) -> list[WriterArgs]:
+        """
+        Generates static scenarios without los whose agents carry the sensor classes of the sensor_mix writer
+        argument, e.g. many short range wide sensors and a few long range narrow ones.
+        """
+        job_list: list[dict[str, Any]] = []
+        for dist in [DistType.UNIFORM, DistType.NORMAL]:
+            for size_name, num_agents in sim_size.items():
+                file_name = f"{dist}_mixed_sensors_{size_name}.json"
+                job = {key: writer_args[key] for key in BenchmarkSetup.geometry_keys if key in writer_args}
+                job["file_path"] = os.path.join("benchmarks", "geometry", f"{dist}_mixed_sensors", file_name)
+                job["sensor_mix"] = copy.deepcopy(writer_args["sensor_mix"])
+                job["los"] = LOSType.NO_LOS
+                job["move"] = MoveType.STATIC
+                job["dist"] = dist
+                job["num_agents"] = num_agents
+                job_list.append(job)
+        return job_list
+
     @staticmethod
     def process_objects(file_path: str,
                         random_seed: int,
@@ -97,34 +137,151 @@ class BenchmarkSetup:
                         shape: str,
                         targets_per_sensor: int,
                         dist: DistType,
-                        los: LOSType) -> None:
+                        los: LOSType,
+                        move: MoveType = MoveType.STATIC,
+                        sensor_mix: list[dict[str, float]] | None = None,
+                        write_references: bool = False,
+                        spatial_order: SpatialOrder = SpatialOrder.NONE,
+                        compression: Codec = Codec.NONE,
+                        num_workers: int = 1,
+                        progress: Connection | None = None) -> None:
         """
         This is the callable which is dispatched to the multiprocessing module. The scrip in __main__.py will fork
         the process and execute this method in the child. It takes an unpacked set of writer arguments as parameters
-        which you can observe in the __main__.py file.
-        """
+        which you can observe in the __main__.py file. If a progress pipe is given, the number of generated objects is
+        reported through it (see utils.progress).
+
+        Every entity is drawn from its own counter-based stream derived from (random_seed, entity kind, index), so the
+        output is bit-identical whether the scenario is built serially or by num_workers processes in chunks.
+
+        Every agent carries the fov/view_range sensor unless a sensor_mix is given (see build_sensor_mix). The world is
+        then sized so that targets_per_sensor holds on average over all sensor classes.
 
-        # --- Set the random seed ---
-        random.seed(random_seed)
+        Entities are written in generation order unless a spatial_order is given, in which case agents and occluders
+        are each sorted along that space filling curve first. Ids stay those of generation order.
 
-        # --- Build the sensor ---
-        sensor = SphericalSectorSensor(view_range=view_range, field_of_view=fov)
+        With a compression codec, the scenario is written as independently compressed chunks to file_path plus the
+        codec's suffix (see utils.compression), which the loader and the harness can read in its place.
+
+        With write_references, static scenarios without los also get a sidecar holding the digest of the sensed pairs
+        (see utils.digest), so the harness can verify the pair set an engine reports. Dynamic scenarios have none,
+        because their pairs depend on the number of updates.
+        """
+        num_occluders = occ_per_agent * num_agents if los == LOSType.LOS else 0
+        reporter = ProgressReporter.from_connection(os.path.basename(file_path), progress)
+        reporter.start(num_agents + num_occluders, "generating")
+
+        # --- Build the sensors ---
+        sensors = BenchmarkSetup.build_sensor_mix(fov, view_range, sensor_mix)
 
         # --- Build the distribution from scenario ---
-        distribution_builder = DistributionBuilder(num_agents)
-        if dist == DistType.UNIFORM:
-            distribution = distribution_builder.build_uniform_from_sensor_and_targets(sensor, targets_per_sensor)
-        elif dist == DistType.NORMAL:
-            distribution = distribution_builder.build_gauss_from_sensor_and_targets(sensor, targets_per_sensor)
-        else:
-            raise NotImplementedError
+        distribution = BenchmarkSetup.build_distribution(dist, num_agents, sensors, targets_per_sensor)
 
         # --- Make and write the Agents ---
-        agents = [Agent.random(distribution=distribution, speed=speed, sensor=sensor) for i in range(num_agents)]
+        agents = BenchmarkSetup.build_in_chunks(BenchmarkSetup.build_agents, num_agents, num_workers, reporter,
+                                                distribution=distribution, speed=speed, sensors=sensors,
+                                                random_seed=random_seed)
         if los == LOSType.NO_LOS:
-            SimObject.write_objects(file_path, agents=agents)
+            if write_references and move == MoveType.STATIC:
+                reporter.message("verifying")
+                from python_benchmarks.sensing.spatial_hashing import get_pairs_digest  # Deferred: reference kernels
+                write_expected(file_path, **get_pairs_digest(agents).to_dict())
+            reporter.message("writing")
+            SimObject.write_objects(file_path, compression, agents=spatial_sort(agents, spatial_order))
+            reporter.finish()
             return
 
         # --- Make and write the occluders ---
-        occluders = [Occluder.random(distribution=distribution, scale=scale, shape=shape) for i in range(occ_per_agent * num_agents)]
-        SimObject.write_objects(file_path, agents=agents, occluders=occluders)
\ No newline at end of file
+        occluders = BenchmarkSetup.build_in_chunks(BenchmarkSetup.build_occluders, num_occluders, num_workers, reporter,
+                                                   distribution=distribution, scale=scale, shape=shape,
+                                                   random_seed=random_seed)
+        reporter.message("writing")
+        SimObject.write_objects(file_path, compression, agents=spatial_sort(agents, spatial_order),
+                                occluders=spatial_sort(occluders, spatial_order))
+        reporter.finish()
+
+    @staticmethod
+    def build_sensor_mix(fov: float, view_range: float, sensor_mix: list[dict[str, float]] | None = None) -> SensorMix:
+        """
+        Returns the sensor classes of a scenario as (fraction, sensor) pairs. A sensor_mix lists one
+        {"fraction", "fov", "view_range"} entry per class; without one, every agent gets the fov/view_range sensor.
+        """
+        if not sensor_mix:
+            return [(1.0, SphericalSectorSensor(view_range=view_range, field_of_view=fov))]
+        return as_sensor_mix([(entry["fraction"],
+                               SphericalSectorSensor(view_range=entry["view_range"], field_of_view=entry["fov"]))
+                              for entry in sensor_mix])
+
+    @staticmethod
+    def pick_sensor(sensors: SensorMix, random_seed: int, index: int) -> SphericalSectorSensor:
+        """
+        Returns the sensor class of agent `index`. The class is drawn from its own stream, so adding a mix does not
+        change the positions or look directions of the agents.
+        """
+        if len(sensors) == 1:
+            return sensors[0][1]
+        draw = entity_rng(random_seed, "sensor_class", index).random()
+        for fraction, sensor in sensors:
+            draw -= fraction
+            if draw < 0:
+                return sensor
+        return sensors[-1][1]
+
+    @staticmethod
+    def build_distribution(dist: DistType, num_agents: int, sensor: SphericalSectorSensor | SensorMix,
+                           targets_per_sensor: int) -> SpatialDistribution:
+        """ Builds the spatial distribution of a scenario, sized for the requested targets per sensor. """
+        distribution_builder = DistributionBuilder(num_agents)
+        if dist == DistType.UNIFORM:
+            return distribution_builder.build_uniform_from_sensor_and_targets(sensor, targets_per_sensor)
+        elif dist == DistType.NORMAL:
+            return distribution_builder.build_gauss_from_sensor_and_targets(sensor, targets_per_sensor)
+        raise NotImplementedError
+
+    @staticmethod
+    def estimate_job(file_path: str, num_agents: int, fov: float, view_range: float, targets_per_sensor: int,
+                     dist: DistType, sensor_mix: list[dict[str, float]] | None = None, num_queries: int = 1000,
+                     **writer_args) -> ScenarioEstimate:
+        """
+        Predicts the sensed-target count and grid occupancy of a job without writing it. Takes the same writer
+        arguments as process_objects; the ones that do not affect the estimate are ignored.
+        """
+        sensors = BenchmarkSetup.build_sensor_mix(fov, view_range, sensor_mix)
+        distribution = BenchmarkSetup.build_distribution(dist, num_agents, sensors, targets_per_sensor)
+        return estimate_scenario(distribution, num_agents, sensors, num_queries=num_queries,
+                                 random_seed=writer_args.get("random_seed", 0))
+
+    @staticmethod
+    def build_agents(distribution: SpatialDistribution, speed: float, sensors: SensorMix, random_seed: int,
+                     start: int, stop: int) -> list[Agent]:
+        """ Builds agents start..stop-1 of a scenario. Agent i only depends on (random_seed, i). """
+        return [Agent.random(distribution, speed, BenchmarkSetup.pick_sensor(sensors, random_seed, i),
+                             rng=entity_rng(random_seed, "agent", i), entity_id=i)
+                for i in range(start, stop)]
+
+    @staticmethod
+    def build_occluders(distribution: SpatialDistribution, scale: float, shape: str, random_seed: int,
+                        start: int, stop: int) -> list[Occluder]:
+        """ Builds occluders start..stop-1 of a scenario. Occluder i only depends on (random_seed, i). """
+        return [Occluder.random(distribution, scale, shape, rng=entity_rng(random_seed, "occluder", i), entity_id=i)
+                for i in range(start, stop)]
+
+    @staticmethod
+    def build_in_chunks(builder: Callable[..., list], total: int, num_workers: int, reporter: ProgressReporter,
+                        **builder_args) -> list:
+        """ Calls builder over consecutive chunks of [0, total), in a process pool when num_workers > 1. """
+        chunks = [(start, min(start + BenchmarkSetup.chunk_size, total))
+                  for start in range(0, total, BenchmarkSetup.chunk_size)]
+        entities = []
+        if num_workers <= 1:
+            for start, stop in chunks:
+                entities.extend(builder(start=start, stop=stop, **builder_args))
+                reporter.advance(stop - start)
+            return entities
+
+        with ProcessPoolExecutor(max_workers=num_workers) as pool:
+            futures = [pool.submit(builder, start=start, stop=stop, **builder_args) for start, stop in chunks]
+            for future, (start, stop) in zip(futures, chunks):
+                entities.extend(future.result())
+                reporter.advance(stop - start)
+        return entities
\ No newline at end of file
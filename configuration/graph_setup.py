@@ -0,0 +1,223 @@
+import os
+from multiprocessing.connection import Connection
+from configuration.benchmark_setup import BenchmarkSetup, DistType, WriterArgs
+from python_benchmarks.graphs.assignment import solve_assignment
+from python_benchmarks.graphs.flow import max_flow
+from python_benchmarks.graphs.network import CSRGraph, build_proximity_graph
+from python_benchmarks.graphs.routing import route_loads
+from sim_objects.assignment import Weapon, Target
+from sim_objects.base import SimObject
+from sim_objects.sensor import SphericalSectorSensor
+from utils.expected import write_expected
+from utils.progress import ProgressReporter
+from utils.rng import entity_rng
+
+
+class GraphBenchmarkSetup:
+    """
+    Holds the methods and parameterization for the graph benchmarks. Like BenchmarkSetup, it turns writer arguments
+    into jobs and provides the callables which the __main__.py script dispatches to child processes. Graph scenarios
+    also store their reference result next to the scenario (see utils.expected), so the harness can verify engines.
+    """
+    wta_dir = os.path.join("benchmarks", "graphs", "weapon_target_assignment")
+    supply_dir = os.path.join("benchmarks", "graphs", "supply_network")
+    routing_dir = os.path.join("benchmarks", "graphs", "network_routing")
+
+    # --- Writer arguments used by each graph benchmark ---
+    wta_keys = ("random_seed", "num_workers", "speed", "fov", "view_range", "targets_per_sensor", "weapon_fraction")
+    network_keys = ("random_seed", "link_range", "neighbors_per_node")
+    supply_keys = network_keys + ("terminal_fraction",)
+    routing_keys = network_keys + ("routing_sources",)
+
+    @staticmethod
+    def generate_wta_benchmark_jobs(sim_size: dict[str, int], writer_args: WriterArgs) -> list[WriterArgs]:
+        """ Generates one weapon-target assignment job per distribution and size. Sizes count agents. """
+        return GraphBenchmarkSetup._generate_jobs(GraphBenchmarkSetup.wta_dir, GraphBenchmarkSetup.wta_keys,
+                                                  "num_agents", sim_size, writer_args)
+
+    @staticmethod
+    def generate_supply_benchmark_jobs(sim_size: dict[str, int], writer_args: WriterArgs) -> list[WriterArgs]:
+        """ Generates one supply network job per distribution and size. Sizes count nodes. """
+        return GraphBenchmarkSetup._generate_jobs(GraphBenchmarkSetup.supply_dir, GraphBenchmarkSetup.supply_keys,
+                                                  "num_nodes", sim_size, writer_args)
+
+    @staticmethod
+    def generate_routing_benchmark_jobs(sim_size: dict[str, int], writer_args: WriterArgs) -> list[WriterArgs]:
+        """ Generates one network routing job per distribution and size. Sizes count nodes. """
+        return GraphBenchmarkSetup._generate_jobs(GraphBenchmarkSetup.routing_dir, GraphBenchmarkSetup.routing_keys,
+                                                  "num_nodes", sim_size, writer_args)
+
+    @staticmethod
+    def _generate_jobs(directory: str, keys: tuple[str, ...], size_key: str, sim_size: dict[str, int],
+                       writer_args: WriterArgs) -> list[WriterArgs]:
+        """ Generates one job per distribution and size, named <dist>_<directory name>_<size>.json. """
+        job_list: list[WriterArgs] = []
+        for dist in [DistType.UNIFORM, DistType.NORMAL]:
+            for size_name, size in sim_size.items():
+                file_name = f"{dist}_{os.path.basename(directory)}_{size_name}.json"
+                job = {key: writer_args[key] for key in keys}
+                job["file_path"] = os.path.join(directory, file_name)
+                job["dist"] = dist
+                job[size_key] = size
+                job_list.append(job)
+        return job_list
+
+    @staticmethod
+    def process_wta(file_path: str,
+                    random_seed: int,
+                    num_agents: int,
+                    speed: float,
+                    fov: float,
+                    view_range: float,
+                    targets_per_sensor: int,
+                    weapon_fraction: float,
+                    dist: DistType,
+                    num_workers: int = 1,
+                    progress: Connection | None = None) -> None:
+        """
+        Builds and writes a weapon-target assignment scenario. The agents are generated exactly like the geometry
+        scenarios. Each agent is then either a weapon (with an effectiveness of 1-10) or a target (with a value of
+        1-100). A weapon may engage a target only if its sensor sees the target (no los), and engaging is worth
+        effectiveness * value. Each weapon engages at most one target and each target is engaged at most once; the
+        engine has to report the maximal total worth as its query result.
+        """
+        reporter = ProgressReporter.from_connection(os.path.basename(file_path), progress)
+        reporter.start(num_agents, "generating")
+
+        # --- Build the agents as for the geometry scenarios ---
+        sensors = BenchmarkSetup.build_sensor_mix(fov, view_range)
+        distribution = BenchmarkSetup.build_distribution(dist, num_agents, sensors, targets_per_sensor)
+        agents = BenchmarkSetup.build_in_chunks(BenchmarkSetup.build_agents, num_agents, num_workers, reporter,
+                                                distribution=distribution, speed=speed, sensors=sensors,
+                                                random_seed=random_seed)
+
+        # --- Split the agents into weapons and targets ---
+        weapons: list[Weapon] = []
+        targets: list[Target] = []
+        weapon_index: dict[int, int] = dict()
+        target_index: dict[int, int] = dict()
+        for agent in agents:
+            rng = entity_rng(random_seed, "wta", agent.id)
+            if rng.random() < weapon_fraction:
+                weapon_index[agent.id] = len(weapons)
+                weapons.append(Weapon(agent=agent.id, effectiveness=rng.randint(1, 10)))
+            else:
+                target_index[agent.id] = len(targets)
+                targets.append(Target(agent=agent.id, value=rng.randint(1, 100)))
+
+        # --- Only sensed targets are assignable ---
+        reporter.message("sensing")
+        from python_benchmarks.sensing.spatial_hashing import get_sensed_pairs  # Deferred: reference kernels
+        edges = []
+        for sensor_id, target_id in get_sensed_pairs(agents):
+            if sensor_id in weapon_index and target_id in target_index:
+                weapon = weapon_index[sensor_id]
+                target = target_index[target_id]
+                edges.append((weapon, target, weapons[weapon].effectiveness * targets[target].value))
+
+        # --- Solve for the reference result and write ---
+        reporter.message("solving")
+        result = solve_assignment(len(weapons), len(targets), edges)
+        reporter.message("writing")
+        SimObject.write_objects(file_path, agents=agents, weapons=weapons, targets=targets)
+        write_expected(file_path, result=result.objective)
+        reporter.finish()
+
+
+    @staticmethod
+    def build_network(num_nodes: int, random_seed: int, link_range: float, neighbors_per_node: int,
+                      dist: DistType) -> CSRGraph:
+        """
+        Builds a proximity network from the same spatial distributions as the geometry scenarios. The world is sized
+        like a sensor with a full field of view, so each node has neighbors_per_node neighbors within link_range on
+        average. Node i is placed from its own random stream.
+        """
+        link_sensor = SphericalSectorSensor(view_range=link_range, field_of_view=360)
+        distribution = BenchmarkSetup.build_distribution(dist, num_nodes, link_sensor, neighbors_per_node)
+        positions = [distribution.get_float3(entity_rng(random_seed, "node", i)) for i in range(num_nodes)]
+        return build_proximity_graph(positions, link_range, random_seed)
+
+    @staticmethod
+    def largest_component(graph: CSRGraph) -> list[int]:
+        """ Returns the nodes of the largest connected component. Arcs come in pairs, so components are undirected. """
+        component_of = [-1] * graph.num_nodes
+        best: list[int] = []
+        for root in range(graph.num_nodes):
+            if component_of[root] != -1:
+                continue
+            component_of[root] = root
+            members = [root]
+            for node in members:
+                for arc in range(graph.offsets[node], graph.offsets[node + 1]):
+                    head = graph.heads[arc]
+                    if component_of[head] == -1:
+                        component_of[head] = root
+                        members.append(head)
+            if len(members) > len(best):
+                best = members
+        return best
+
+    @staticmethod
+    def process_supply(file_path: str,
+                       random_seed: int,
+                       num_nodes: int,
+                       link_range: float,
+                       neighbors_per_node: int,
+                       terminal_fraction: float,
+                       dist: DistType,
+                       progress: Connection | None = None) -> None:
+        """
+        Builds and writes a supply network scenario. Within the largest connected component, the terminal_fraction of
+        nodes with the smallest x coordinate are suppliers and the same number with the largest x are consumers. The
+        engine has to report the maximum flow from all suppliers to all consumers through the arc capacities.
+        """
+        reporter = ProgressReporter.from_connection(os.path.basename(file_path), progress)
+        reporter.start(message="building")
+        graph = GraphBenchmarkSetup.build_network(num_nodes, random_seed, link_range, neighbors_per_node, dist)
+
+        # --- Terminals sit on opposite sides of the largest component, so the flow is never trivially 0 ---
+        component = GraphBenchmarkSetup.largest_component(graph)
+        num_terminals = max(1, min(int(num_nodes * terminal_fraction), len(component) // 2))
+        by_x = sorted(component, key=lambda node: (graph.positions[node].x, node))
+        suppliers = sorted(by_x[:num_terminals])
+        consumers = sorted(by_x[-num_terminals:])
+
+        reporter.message("solving")
+        flow = max_flow(graph, suppliers, consumers)
+        reporter.message("writing")
+        graph.write(file_path, suppliers=suppliers, consumers=consumers)
+        write_expected(file_path, result=flow)
+        reporter.finish()
+
+    @staticmethod
+    def process_routing(file_path: str,
+                        random_seed: int,
+                        num_nodes: int,
+                        link_range: float,
+                        neighbors_per_node: int,
+                        routing_sources: int,
+                        dist: DistType,
+                        progress: Connection | None = None) -> None:
+        """
+        Builds and writes a network routing scenario. Every listed source sends one unit to every node it can reach
+        along a shortest path (by arc weight), with ties going to the lowest-numbered arc (see RoutingResult). The
+        engine has to report the load checksum, sum((arc + 1) * load) modulo 2^64, which depends on every per-arc load.
+
+        The sources are routing_sources nodes sampled from the scenario's seed, not all nodes: the reference runs one
+        Dijkstra per source, and routing from all 100000 nodes of xl would take days in Python. A routing_sources of 0
+        (or at least num_nodes) routes from every node.
+        """
+        reporter = ProgressReporter.from_connection(os.path.basename(file_path), progress)
+        reporter.start(message="building")
+        graph = GraphBenchmarkSetup.build_network(num_nodes, random_seed, link_range, neighbors_per_node, dist)
+        if routing_sources <= 0 or routing_sources >= num_nodes:
+            sources = list(range(num_nodes))
+        else:
+            sources = sorted(entity_rng(random_seed, "routing_sources", 0).sample(range(num_nodes), routing_sources))
+
+        reporter.message("solving")
+        result = route_loads(graph, sources)
+        reporter.message("writing")
+        graph.write(file_path, sources=sources)
+        write_expected(file_path, result=result.load_checksum)
+        reporter.finish()
@@ -0,0 +1,56 @@
+from multiprocessing import Process
+from multiprocessing.connection import Connection
+import time
+from utils.progress import ProgressEvent, ProgressKind, watch_processes
+
+
+class HeadlessSetupUI:
+    """
+    Plain, line-oriented replacement for SetupUI. It has the same interface but never imports rich, which makes it a
+    better fit for CI logs and for machines where start-up time matters. Progress within a job is printed in quarters.
+    """
+    num_jobs: int
+    workers: dict[str, tuple[Process, Connection]]
+    completed_jobs: int
+    last_quarter: dict[str, int]
+    start_time: float
+    end_time: float
+
+    def __init__(self, num_jobs: int, workers: dict[str, tuple[Process, Connection]]) -> None:
+        self.num_jobs = num_jobs
+        self.workers = workers
+        self.completed_jobs = 0
+        self.last_quarter = dict()
+        self.welcome()
+
+    def welcome(self) -> None:
+        print("ABM Simulation Benchmark Generator", flush=True)
+        print(f"Found {self.num_jobs} benchmark scenarios to generate.", flush=True)
+
+    def poll(self) -> None:
+        """ Blocks until every generator has exited, printing a line for each relevant progress event. """
+        self.start_time = time.time()
+        watch_processes(self.workers, self.handle)
+        self.end_time = time.time()
+
+    def handle(self, event: ProgressEvent) -> None:
+        """ Prints a progress event as a single line. """
+        if event.kind == ProgressKind.STARTED:
+            self.last_quarter[event.job] = 0
+            print(f"{event.job}: started ({event.total} objects)", flush=True)
+        elif event.kind == ProgressKind.ADVANCED:
+            if event.message:
+                print(f"{event.job}: {event.message}", flush=True)
+                return
+            quarter = 4 * event.completed // event.total if event.total else 0
+            if quarter > self.last_quarter.get(event.job, 0):
+                self.last_quarter[event.job] = quarter
+                print(f"{event.job}: {event.completed} of {event.total} objects", flush=True)
+        else:
+            self.completed_jobs += 1
+            status = "generated" if event.kind == ProgressKind.FINISHED else f"FAILED ({event.message})"
+            print(f"[{self.completed_jobs}/{self.num_jobs}] {event.job}: {status}", flush=True)
+
+    def finish(self) -> None:
+        print(f"Successfully finished building {self.num_jobs} benchmarks in {self.end_time - self.start_time:.2f} seconds.",
+              flush=True)
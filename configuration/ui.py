@@ -1,15 +1,18 @@
 from multiprocessing import Process
+from multiprocessing.connection import Connection
 import time
 from typing import Any
 from rich.console import Console
-from rich.progress import Progress, BarColumn, TextColumn, TimeRemainingColumn
+from rich.progress import Progress, BarColumn, TextColumn, TimeRemainingColumn, TaskID
 from rich.panel import Panel
 from rich.text import Text
+from utils.progress import ProgressEvent, ProgressKind, watch_processes
 
 class SetupUI:
     """
     Represents the terminal-based UI and related methods to provide the user feedback during configuration. Because
     configuration and build can take around 30 seconds on moderately powered desktop, this feedback is important.
+    The UI is driven by the progress events of the generator processes and only redraws when one arrives.
     """
 
     welcome_message = Text("Welcome to the ABM Simulation Benchmark Generator", justify="center", style="bold green")
@@ -23,14 +26,19 @@ class SetupUI:
     ]
 
     num_jobs: int
-    processes: list[Process]
+    workers: dict[str, tuple[Process, Connection]]
     console: Console
+    progress: Progress
+    job_task: TaskID
+    object_task: TaskID
+    objects_done: dict[str, int]
     start_time: Any
     end_time: Any
 
-    def __init__(self, num_jobs: int, processes: list[Process]) -> None:
+    def __init__(self, num_jobs: int, workers: dict[str, tuple[Process, Connection]]) -> None:
         self.num_jobs = num_jobs
-        self.processes = processes
+        self.workers = workers
+        self.objects_done = dict()
         self.console = Console()
         self.welcome()
 
@@ -39,20 +47,32 @@ class SetupUI:
         self.console.print(f"Found [bold yellow]{self.num_jobs}[/bold yellow] benchmark scenarios to generate.")
 
     def poll(self) -> None:
+        """ Blocks until every generator has exited, redrawing only when a progress event arrives. """
         self.start_time = time.time()
-        with Progress(*self.progress_columns, console=self.console) as progress:
-            task = progress.add_task("[green]Generating scenarios...", total=self.num_jobs)
-            completed_processes = 0
-            while completed_processes < self.num_jobs:
-                for p in self.processes:
-                    if not p.is_alive():
-                        p.join()
-                        self.processes.remove(p)
-                        completed_processes += 1
-                        progress.update(task, advance=1)
-                time.sleep(0.1)
+        with Progress(*self.progress_columns, console=self.console, auto_refresh=False) as self.progress:
+            self.job_task = self.progress.add_task("[green]Generating scenarios...", total=self.num_jobs)
+            self.object_task = self.progress.add_task("[cyan]Generating objects...", total=0)
+            watch_processes(self.workers, self.handle)
         self.end_time = time.time()
 
+    def handle(self, event: ProgressEvent) -> None:
+        """ Applies a progress event to the bars. """
+        if event.kind == ProgressKind.STARTED:
+            self.objects_done[event.job] = 0
+            total = self.progress.tasks[self.object_task].total + event.total
+            self.progress.update(self.object_task, total=total)
+        elif event.kind == ProgressKind.ADVANCED:
+            self.progress.advance(self.object_task, event.completed - self.objects_done.get(event.job, 0))
+            self.objects_done[event.job] = event.completed
+        elif event.kind == ProgressKind.FINISHED:
+            self.progress.advance(self.object_task, event.completed - self.objects_done.get(event.job, 0))
+            self.objects_done[event.job] = event.completed
+            self.progress.advance(self.job_task)
+        elif event.kind == ProgressKind.FAILED:
+            self.console.print(f"[bold red]✗ {event.job} failed ({event.message})[/bold red]")
+            self.progress.advance(self.job_task)
+        self.progress.refresh()
+
     def finish(self) -> None:
         self.console.print(
             f"\n[bold green]✓ Successfully finished building {self.num_jobs} benchmarks in {self.end_time - self.start_time:.2f} seconds.[/bold green]")
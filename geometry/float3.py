@@ -12,28 +12,33 @@ class Float3:
     z: float = 0
 
     @classmethod
-    def from_uniform(cls, min_f3: 'Float3', max_f3: 'Float3') -> 'Float3':
-        """ Return a random float3 from inside the given bounds. """
-        x = random.uniform(min_f3.x, max_f3.x)
-        y = random.uniform(min_f3.y, max_f3.y)
-        z = random.uniform(min_f3.z, max_f3.z)
+    def from_uniform(cls, min_f3: 'Float3', max_f3: 'Float3', rng: random.Random | None = None) -> 'Float3':
+        """
+        Return a random float3 from inside the given bounds. Like every random constructor in this package, it draws
+        from rng when one is given and falls back to the module level functions of random otherwise.
+        """
+        rng = rng if rng is not None else random
+        x = rng.uniform(min_f3.x, max_f3.x)
+        y = rng.uniform(min_f3.y, max_f3.y)
+        z = rng.uniform(min_f3.z, max_f3.z)
         return cls(x, y, z)
 
     @classmethod
-    def from_normal(cls, mu: 'Float3', sigma: 'Float3') -> 'Float3':
+    def from_normal(cls, mu: 'Float3', sigma: 'Float3', rng: random.Random | None = None) -> 'Float3':
         """
         Return a normally distributed float3 given mean and standard deviation. Note that sigma accepts
         a float3, so this method supports non-spherical distributions.
         """
-        x = random.gauss(mu.x, sigma.x)
-        y = random.gauss(mu.y, sigma.y)
-        z = random.gauss(mu.z, sigma.z)
+        rng = rng if rng is not None else random
+        x = rng.gauss(mu.x, sigma.x)
+        y = rng.gauss(mu.y, sigma.y)
+        z = rng.gauss(mu.z, sigma.z)
         return cls(x, y, z)
 
     @classmethod
-    def point_on_unit_sphere(cls) -> 'Float3':
+    def point_on_unit_sphere(cls, rng: random.Random | None = None) -> 'Float3':
         """ Return a point on the unit sphere."""
-        return cls.from_normal(cls.zero(), cls.one()).normalized()
+        return cls.from_normal(cls.zero(), cls.one(), rng).normalized()
 
     @classmethod
     def zero(cls) -> 'Float3':
@@ -93,6 +98,12 @@ class Float3:
         """ Returns the dot product of two Float3. """
         return self.x * other.x + self.y * other.y + self.z * other.z
 
+    def cross(self, other: 'Float3') -> 'Float3':
+        """ Returns the cross product of two Float3. """
+        return Float3(self.y * other.z - self.z * other.y,
+                      self.z * other.x - self.x * other.z,
+                      self.x * other.y - self.y * other.x)
+
     def magnitude(self) -> float:
         """ Returns the magnitude of the Float3. """
         return math.sqrt(self.x ** 2 + self.y ** 2 + self.z ** 2)
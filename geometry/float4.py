@@ -30,14 +30,26 @@ class Float4:
         return cls(w, x, y, z)
 
     @classmethod
-    def from_axis(cls, axis: Float3) -> 'Float4':
+    def from_axis(cls, axis: Float3, rng: random.Random | None = None) -> 'Float4':
         """ Returns a quaternion randomly rotated around a given axis. """
-        theta = random.random() * 2 * math.pi
+        rng = rng if rng is not None else random
+        theta = rng.random() * 2 * math.pi
         return cls.from_theta_and_axis(theta, axis)
 
+    def conjugate(self) -> 'Float4':
+        """ Returns the inverse rotation. """
+        return Float4(self.w, -self.x, -self.y, -self.z)
+
+    def rotate(self, vector: Float3) -> Float3:
+        """ Rotates a vector: v' = v + 2w (q x v) + 2 q x (q x v), with q the vector part. """
+        axis = Float3(self.x, self.y, self.z)
+        twice_cross = axis.cross(vector) * 2.0
+        return vector + twice_cross * self.w + axis.cross(twice_cross)
+
     @classmethod
-    def random(cls) -> 'Float4':
+    def random(cls, rng: random.Random | None = None) -> 'Float4':
         """ Returns a quaternion randomly rotated around a random axis."""
-        theta = random.random() * 2 * math.pi
-        axis = Float3.point_on_unit_sphere()
+        rng = rng if rng is not None else random
+        theta = rng.random() * 2 * math.pi
+        axis = Float3.point_on_unit_sphere(rng)
         return cls.from_theta_and_axis(theta, axis)
\ No newline at end of file
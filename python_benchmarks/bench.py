@@ -0,0 +1,269 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, asdict
+from typing import Callable
+
+# --- Sizes in agents, matching the generated scenarios (configuration/__main__.py) ---
+SIZES = {"sm": 100, "md": 1000, "lg": 10000, "xl": 100000}
+
+# --- Seed of every kernel's inputs, so runs on different machines and commits time the same work ---
+DEFAULT_SEED = 42
+
+# --- Queries timed per size by the grid query kernel; each query is far more expensive than the other ops ---
+MAX_QUERIES = 2000
+
+# --- Each timed repeat calls the kernel until at least this many seconds passed, so timer noise averages out ---
+MIN_REPEAT_TIME = 0.2
+
+# --- A kernel is set up with (number of agents, seed) and returns the timed callable, which returns its op count ---
+type Kernel = Callable[[], int]
+type KernelSetup = Callable[[int, int], Kernel]
+
+
+@dataclass
+class KernelTiming:
+    """ Timing of one kernel at one size. seconds is one call in the fastest repeat; memory is measured in a separate run. """
+    kernel: str
+    size: str
+    ops: int
+    seconds: float
+    ops_per_sec: float
+    peak_kib: float
+    retained_kib: float
+
+
+def _build_distribution(num_agents: int) -> tuple:
+    """ Returns the default sensor mix and the uniform distribution of a scenario, exactly as the generator would. """
+    from configuration.benchmark_setup import BenchmarkSetup, DistType
+    sensors = BenchmarkSetup.build_sensor_mix(60, 10)
+    return sensors, BenchmarkSetup.build_distribution(DistType.UNIFORM, num_agents, sensors, 5)
+
+
+def _build_agents(num_agents: int, seed: int) -> list:
+    """ Builds the agents of a uniform scenario with the default sensor, exactly as the generator would. """
+    from configuration.benchmark_setup import BenchmarkSetup
+    sensors, distribution = _build_distribution(num_agents)
+    return BenchmarkSetup.build_agents(distribution, 1, sensors, seed, 0, num_agents)
+
+
+def _float3_ops(num_ops: int, seed: int) -> Kernel:
+    """ Add, subtract, scale, dot and magnitude on pairs of Float3. """
+    from geometry.float3 import Float3
+    from utils.rng import entity_rng
+    rng = entity_rng(seed, "bench_float3", 0)
+    pairs = [(Float3.from_uniform(Float3.zero(), Float3.one(), rng), Float3.from_uniform(Float3.zero(), Float3.one(), rng))
+             for _ in range(num_ops)]
+
+    def run() -> int:
+        for first, second in pairs:
+            ((first + second) * 0.5 - second).magnitude()
+            first.dot(second)
+        return num_ops
+
+    return run
+
+
+def _float4_from_theta_and_axis(num_ops: int, seed: int) -> Kernel:
+    """ Quaternions from an angle and a unit axis. """
+    from geometry.float3 import Float3
+    from geometry.float4 import Float4
+    from utils.rng import entity_rng
+    rng = entity_rng(seed, "bench_float4", 0)
+    inputs = [(rng.uniform(0.0, 6.283185307179586), Float3.point_on_unit_sphere(rng)) for _ in range(num_ops)]
+
+    def run() -> int:
+        for theta, axis in inputs:
+            Float4.from_theta_and_axis(theta, axis)
+        return num_ops
+
+    return run
+
+
+def _can_sensor_see_target(num_agents: int, seed: int) -> Kernel:
+    """ The narrow phase test, on one random (sensor, target) pair per agent. """
+    from python_benchmarks.sensing.utils import can_sensor_see_target
+    from utils.rng import entity_rng
+    agents = _build_agents(num_agents, seed)
+    rng = entity_rng(seed, "bench_pairs", 0)
+    pairs = [(agent, rng.choice(agents)) for agent in agents]
+
+    def run() -> int:
+        for sensor, target in pairs:
+            can_sensor_see_target(sensor, target)
+        return len(pairs)
+
+    return run
+
+
+def _grid_build(num_agents: int, seed: int) -> Kernel:
+    """ Building the spatial grid; one op is one inserted agent. """
+    from python_benchmarks.sensing.spatial_hashing import build_grid
+    agents = _build_agents(num_agents, seed)
+
+    def run() -> int:
+        build_grid(agents)
+        return num_agents
+
+    return run
+
+
+def _grid_query(num_agents: int, seed: int) -> Kernel:
+    """ Cone culled grid queries of up to MAX_QUERIES sensors; one op is one query. """
+    from python_benchmarks.sensing.spatial_hashing import build_grid
+    from utils.rng import entity_rng
+    agents = _build_agents(num_agents, seed)
+    grid = build_grid(agents)
+    sensors = entity_rng(seed, "bench_queries", 0).sample(agents, min(num_agents, MAX_QUERIES))
+
+    def run() -> int:
+        for agent in sensors:
+            grid.query_grid(agent.position, agent.sensor.view_range, agent.sensor.look_direction,
+                            agent.sensor.field_of_view / 2)
+        return len(sensors)
+
+    return run
+
+
+def _scenario_generation(num_agents: int, seed: int) -> Kernel:
+    """ Drawing the agents of a scenario from its distribution (built in the setup); one op is one agent. """
+    from configuration.benchmark_setup import BenchmarkSetup
+    sensors, distribution = _build_distribution(num_agents)
+
+    def run() -> int:
+        return len(BenchmarkSetup.build_agents(distribution, 1, sensors, seed, 0, num_agents))
+
+    return run
+
+
+def _scenario_writing(num_agents: int, seed: int) -> Kernel:
+    """ Writing the agents of a scenario as JSON to a temporary file, removed again after each run; one op is one agent. """
+    from sim_objects.base import SimObject
+    agents = _build_agents(num_agents, seed)
+    path = os.path.join(tempfile.gettempdir(), f"sim-bench-{os.getpid()}.json")
+
+    def run() -> int:
+        os.remove(SimObject.write_objects(path, agents=agents))
+        return num_agents
+
+    return run
+
+
+KERNELS: dict[str, KernelSetup] = {
+    "float3_ops": _float3_ops,
+    "float4_from_theta_and_axis": _float4_from_theta_and_axis,
+    "can_sensor_see_target": _can_sensor_see_target,
+    "grid_build": _grid_build,
+    "grid_query": _grid_query,
+    "scenario_generation": _scenario_generation,
+    "scenario_writing": _scenario_writing,
+}
+
+
+def measure_kernel(name: str, size: str, repeats: int = 3, seed: int = DEFAULT_SEED) -> KernelTiming:
+    """
+    Times one kernel at one size. The setup (inputs, grids) is not timed. Each of the `repeats` timed repeats calls
+    the kernel until MIN_REPEAT_TIME has passed (like timeit's autorange) and yields the time of one call; the fastest
+    repeat counts. The kernel then runs once more under tracemalloc for its peak and retained memory, which would
+    otherwise slow down the timed runs.
+    """
+    run = KERNELS[name](SIZES[size], seed)
+    best = float("inf")
+    ops = 0
+    for _ in range(repeats):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            ops = run()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= MIN_REPEAT_TIME:
+                break
+        best = min(best, elapsed / calls)
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    run()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return KernelTiming(name, size, ops, best, ops / best if best > 0 else float("inf"),
+                        (peak - before) / 1024, (after - before) / 1024)
+
+
+def find_regressions(timings: list[KernelTiming], baseline: dict[str, dict], tolerance: float) -> list[str]:
+    """ Compares timings against a baseline produced by --output and returns a description of each regression. """
+    regressions = []
+    for timing in timings:
+        reference = baseline.get(timing.kernel, dict()).get(timing.size)
+        if reference is None:
+            continue
+        limit = reference["ops_per_sec"] * (1.0 - tolerance)
+        if timing.ops_per_sec < limit:
+            regressions.append(f"{timing.kernel} {timing.size}: {timing.ops_per_sec:.0f} ops/s < {limit:.0f} ops/s "
+                               f"(baseline {reference['ops_per_sec']:.0f} ops/s)")
+    return regressions
+
+
+def main() -> int:
+    """
+    Microbenchmarks of the project's own Python hot paths: geometry operations, the narrow phase test, the spatial
+    grid and scenario generation and writing. Every kernel runs on fixed seeds at each requested size. Prints a
+    report, optionally writes it as JSON, and returns a non-zero exit code when a baseline is given and a kernel got
+    slower than it by more than the tolerance.
+    """
+    parser = argparse.ArgumentParser(prog="python -m python_benchmarks.bench",
+                                     description="Times the geometry and sensing kernels of this project.")
+    parser.add_argument("--kernels", nargs="+", choices=list(KERNELS), default=list(KERNELS),
+                        help="Kernels to run (default: all).")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["sm", "md", "lg"],
+                        help="Sizes to run (default: sm md lg; xl takes minutes).")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed repeats per kernel and size; the fastest is kept.")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Seed of the kernel inputs.")
+    parser.add_argument("--output", help="Write the timings to this JSON file.")
+    parser.add_argument("--baseline", help="Compare against timings previously written with --output.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown against the baseline.")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["kernels"]
+
+    print(f"{'kernel':<28}{'size':>5}{'ops':>9}{'best (s)':>12}{'ops/s':>14}{'peak (KiB)':>12}{'kept (KiB)':>12}"
+          + (f"{'vs base':>9}" if baseline else ""))
+    timings = []
+    for kernel in args.kernels:
+        for size in args.sizes:
+            timing = measure_kernel(kernel, size, args.repeats, args.seed)
+            timings.append(timing)
+            line = (f"{timing.kernel:<28}{timing.size:>5}{timing.ops:>9}{timing.seconds:>12.5f}"
+                    f"{timing.ops_per_sec:>14.0f}{timing.peak_kib:>12.1f}{timing.retained_kib:>12.1f}")
+            reference = (baseline or dict()).get(kernel, dict()).get(size)
+            if reference is not None:
+                line += f"{timing.ops_per_sec / reference['ops_per_sec']:>8.2f}x"
+            print(line, flush=True)
+
+    if args.output:
+        kernels: dict[str, dict[str, dict]] = dict()
+        for timing in timings:
+            kernels.setdefault(timing.kernel, dict())[timing.size] = asdict(timing)
+        with open(args.output, "w") as file:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(), "seed": args.seed,
+                       "repeats": args.repeats, "kernels": kernels}, file, indent=4)
+
+    if baseline is not None:
+        regressions = find_regressions(timings, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,389 @@
+import argparse
+import getpass
+import json
+import os
+import socket
+import socketserver
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Any
+from geometry.float3 import Float3
+from python_benchmarks.sensing import spatial_hashing
+from python_benchmarks.sensing.loader import load_scenario
+from python_benchmarks.sensing.spatial_hashing import MultiLevelGrid, OccluderGrid
+from python_benchmarks.sensing.utils import can_sensor_see_target
+from sim_objects.agent import Agent
+from utils.compression import find_scenario
+from utils.digest import PairDigest, format_digest, sensor_digests
+
+# --- Socket of the daemon. One per user, so two users on a benchmark host never share scenarios ---
+DEFAULT_SOCKET_PATH = os.path.join(tempfile.gettempdir(), f"sim-benchmarking-{getpass.getuser()}.sock")
+
+# --- Entities (agents + occluders) kept in memory before the least recently used scenario is dropped ---
+DEFAULT_MAX_ENTITIES = 2_000_000
+
+
+class ScenarioIndex:
+    """
+    A scenario held in memory together with its broad-phase and occluder grids. The grids are built on first use and
+    pair digests are memoized per los flag, so repeated queries cost a dictionary lookup.
+    """
+    path: str
+    mtime: float
+    agents: list[Agent]
+    agents_by_id: dict[int, Agent]
+    queries: int = 0
+
+    def __init__(self, path: str):
+        self.path = path
+        self.mtime = os.path.getmtime(find_scenario(path) or path)
+        self.agents, self.occluders = load_scenario(path)
+        self.agents_by_id = {agent.id: agent for agent in self.agents}
+        self._spatial_grid: MultiLevelGrid | None = None
+        self._occluder_grid: OccluderGrid | None = None
+        self._digests: dict[bool, PairDigest] = dict()
+
+    @property
+    def num_entities(self) -> int:
+        """ Number of agents and occluders, the unit of the cache budget. """
+        return len(self.agents) + len(self.occluders)
+
+    def is_stale(self) -> bool:
+        """ Checks whether the scenario file (plain or compressed) changed on disk since it was loaded. """
+        source = find_scenario(self.path)
+        return source is None or os.path.getmtime(source) != self.mtime
+
+    def spatial_grid(self) -> MultiLevelGrid:
+        """ Returns the broad-phase grid over the agents, building it on first use. """
+        if self._spatial_grid is None:
+            self._spatial_grid = spatial_hashing.build_grid(self.agents)
+        return self._spatial_grid
+
+    def occluder_grid(self) -> OccluderGrid:
+        """ Returns the grid over the occluders, building it on first use. """
+        if self._occluder_grid is None:
+            self._occluder_grid = spatial_hashing.build_occluder_grid(self.occluders,
+                                                                      spatial_hashing.los_cell_size(self.agents))
+        return self._occluder_grid
+
+    def is_cached(self, los: bool) -> bool:
+        """ Checks whether the digest for this los flag was already computed. """
+        return los in self._digests
+
+    def digest(self, los: bool) -> PairDigest:
+        """ Returns the digest of the sensed pairs, with or without line of sight tests. """
+        if los not in self._digests:
+            pairs = spatial_hashing.get_sensed_pairs(self.agents, spatial_grid=self.spatial_grid(),
+                                                     occluder_grid=self.occluder_grid() if los else None)
+            self._digests[los] = PairDigest().add_pairs(pairs)
+        return self._digests[los]
+
+    def sensor_digests(self, ranges: list[tuple[int, int]], los: bool) -> dict[int, int]:
+        """ Returns the per-sensor digests of the sensors whose ids fall in the [start, stop) ranges. """
+        sensors = [agent for agent in self.agents if any(start <= agent.id < stop for start, stop in ranges)]
+        return sensor_digests(spatial_hashing.get_sensed_pairs(self.agents, spatial_grid=self.spatial_grid(),
+                                                               occluder_grid=self.occluder_grid() if los else None,
+                                                               sensors=sensors))
+
+    def targets(self, sensor_id: int, los: bool) -> list[int]:
+        """ Returns the ids of the targets seen by one sensor. """
+        agent = self.agents_by_id[sensor_id]
+        sensor = agent.sensor
+        occluder_grid = self.occluder_grid() if los else None
+        return sorted(target.id for target in self.spatial_grid().query_grid(agent.position, sensor.view_range,
+                                                                             sensor.look_direction,
+                                                                             sensor.field_of_view / 2)
+                      if can_sensor_see_target(agent, target) and (
+                          occluder_grid is None or not occluder_grid.is_blocked(agent.position, target.position)))
+
+    def is_blocked(self, start: Float3, end: Float3) -> bool:
+        """ Checks whether an occluder intersects the segment from start to end. """
+        return self.occluder_grid().is_blocked(start, end)
+
+
+class ReferenceCache:
+    """
+    Least recently used cache of scenario indexes. Scenarios are evicted once the cached entities exceed
+    max_entities, but the most recently used scenario is always kept, however large it is.
+    """
+    max_entities: int
+    indexes: OrderedDict[str, ScenarioIndex]
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    def __init__(self, max_entities: int = DEFAULT_MAX_ENTITIES):
+        self.max_entities = max_entities
+        self.indexes = OrderedDict()
+
+    @property
+    def num_entities(self) -> int:
+        """ Entities held by all cached scenarios. """
+        return sum(index.num_entities for index in self.indexes.values())
+
+    def get(self, path: str) -> tuple[ScenarioIndex, bool]:
+        """ Returns the index of a scenario, loading it if needed, and whether it was already cached. """
+        index = self.indexes.get(path)
+        if index is not None and index.is_stale():
+            del self.indexes[path]
+            index = None
+        if index is not None:
+            self.hits += 1
+            self.indexes.move_to_end(path)
+            return index, True
+
+        self.misses += 1
+        index = ScenarioIndex(path)
+        self.indexes[path] = index
+        while len(self.indexes) > 1 and self.num_entities > self.max_entities:
+            self.indexes.popitem(last=False)
+            self.evictions += 1
+        return index, False
+
+    def evict(self, path: str | None = None) -> int:
+        """ Drops one scenario, or all of them without a path. Returns the number of scenarios dropped. """
+        if path is None:
+            dropped = len(self.indexes)
+            self.indexes.clear()
+        else:
+            dropped = 1 if self.indexes.pop(path, None) is not None else 0
+        self.evictions += dropped
+        return dropped
+
+    def stats(self) -> dict[str, Any]:
+        """ Returns the cache counters and the cached scenarios, least recently used first. """
+        return {
+            "entities": self.num_entities,
+            "max_entities": self.max_entities,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "scenarios": [{"path": index.path, "entities": index.num_entities, "queries": index.queries}
+                          for index in self.indexes.values()],
+        }
+
+
+class ReferenceDaemon:
+    """
+    Executes reference requests against a scenario cache. Requests are served one at a time, so the cache needs no
+    locking; a slow first query on a large scenario delays the others, but every later query on it is answered from
+    memory.
+    """
+    cache: ReferenceCache
+    stopping: bool = False
+
+    def __init__(self, cache: ReferenceCache):
+        self.cache = cache
+
+    def execute(self, payload: dict[str, Any]) -> dict[str, Any]:
+        """ Executes one request and returns the response fields (see the request function for the protocol). """
+        op = payload.get("op")
+        if op == "ping":
+            return {"result": os.getpid()}
+        if op == "stats":
+            return {"result": self.cache.stats()}
+        if op == "evict":
+            path = payload.get("path")
+            return {"result": self.cache.evict(os.path.realpath(path) if path else None)}
+        if op == "shutdown":
+            self.stopping = True
+            return {"result": True}
+
+        index, cached = self.cache.get(os.path.realpath(payload["path"]))
+        index.queries += 1
+        los = bool(payload.get("los", False))
+        if op == "load":
+            return {"result": index.num_entities, "cached": cached}
+        if op in ("count", "digest"):
+            cached = cached and index.is_cached(los)
+            digest = index.digest(los)
+            response = {"result": digest.count, "cached": cached}
+            if op == "digest":
+                response["digest"] = digest.to_dict()
+            return response
+        if op == "targets":
+            return {"result": index.targets(int(payload["sensor"]), los), "cached": cached}
+        if op == "sensors":
+            ranges = [(int(start), int(stop)) for start, stop in payload["ranges"]]
+            digests = index.sensor_digests(ranges, los)
+            return {"result": {str(sensor_id): format_digest(value) for sensor_id, value in sorted(digests.items())},
+                    "cached": cached}
+        if op == "los":
+            start, end = Float3(*payload["start"]), Float3(*payload["end"])
+            return {"result": index.is_blocked(start, end), "cached": cached}
+        raise ValueError(f"Unknown op: {op}")
+
+
+class ReferenceRequestHandler(socketserver.StreamRequestHandler):
+    """ Reads newline delimited JSON requests from one connection and writes one JSON response line per request. """
+
+    def handle(self) -> None:
+        daemon: ReferenceDaemon = self.server.reference_daemon
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            start = time.perf_counter()
+            try:
+                response = {"ok": True, "cached": False} | daemon.execute(json.loads(line))
+            except (OSError, ValueError, KeyError, TypeError) as error:
+                response = {"ok": False, "error": f"{type(error).__name__}: {error}"}
+            response["elapsed"] = time.perf_counter() - start
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+def _remove_stale_socket(socket_path: str) -> None:
+    """ Removes a socket file left behind by a daemon that died. Raises if a daemon is still listening on it. """
+    if not os.path.exists(socket_path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except OSError:
+        os.unlink(socket_path)
+    else:
+        raise RuntimeError(f"A reference daemon is already listening on {socket_path}.")
+    finally:
+        probe.close()
+
+
+def serve(socket_path: str = DEFAULT_SOCKET_PATH, max_entities: int = DEFAULT_MAX_ENTITIES) -> None:
+    """ Runs the daemon in the foreground until a shutdown request or Ctrl+C. Needs Unix domain sockets. """
+    daemon = ReferenceDaemon(ReferenceCache(max_entities))
+    _remove_stale_socket(socket_path)
+    with socketserver.UnixStreamServer(socket_path, ReferenceRequestHandler) as server:
+        server.reference_daemon = daemon
+        os.chmod(socket_path, 0o600)
+        print(f"Reference daemon listening on {socket_path} (pid {os.getpid()})", flush=True)
+        try:
+            while not daemon.stopping:
+                server.handle_request()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(socket_path)
+
+
+def request(payload: dict[str, Any], socket_path: str = DEFAULT_SOCKET_PATH,
+            timeout: float | None = None) -> dict[str, Any]:
+    """
+    Sends one request to the daemon and returns its response. A request is a JSON object with an "op":
+      ping, stats, shutdown              -- no arguments
+      load, count, digest                -- "path" of a scenario, optional "los" (default false)
+      targets                            -- "path", "sensor" (agent id), optional "los"
+      sensors                            -- "path", "ranges" of sensor ids as [[start, stop], ...], optional "los"
+      los                                -- "path", segment "start" and "end" as [x, y, z]
+      evict                              -- optional "path"; drops every scenario without one
+    A response holds "ok", "result", "elapsed" (seconds spent in the daemon) and "cached" (nothing had to be loaded
+    or computed), plus "digest" for digest requests or "error" when ok is false. The result of a sensors request maps
+    each sensor id with pairs to its digest (16 hex digits). Raises OSError when no daemon is
+    listening.
+    """
+    if "path" in payload:
+        payload = payload | {"path": os.path.abspath(payload["path"])}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(timeout)
+        connection.connect(socket_path)
+        with connection.makefile("rwb") as stream:
+            stream.write(json.dumps(payload).encode("utf-8") + b"\n")
+            stream.flush()
+            line = stream.readline()
+    if not line:
+        raise ConnectionError("The reference daemon closed the connection without answering.")
+    return json.loads(line)
+
+
+def is_running(socket_path: str = DEFAULT_SOCKET_PATH) -> bool:
+    """ Checks whether a daemon answers on the socket. """
+    try:
+        return request({"op": "ping"}, socket_path, timeout=1.0)["ok"]
+    except (OSError, ValueError):
+        return False
+
+
+def reference_digest(scenario_path: str, los: bool, socket_path: str | None = None, timeout: float | None = None,
+                     in_process: bool = True) -> PairDigest | None:
+    """
+    Returns the reference digest of a scenario's sensed pairs. The daemon is asked first. When none is running (or
+    sockets are unavailable), the digest is computed in this process, or None is returned if in_process is False.
+    A daemon that does not answer within timeout seconds raises TimeoutError; it is never replaced by a computation
+    in this process, which would take at least as long.
+    """
+    try:
+        response = request({"op": "digest", "path": scenario_path, "los": los}, socket_path or DEFAULT_SOCKET_PATH,
+                           timeout)
+    except TimeoutError:
+        raise
+    except (OSError, AttributeError):
+        return ScenarioIndex(scenario_path).digest(los) if in_process else None
+    if not response["ok"]:
+        raise RuntimeError(f"Reference daemon failed on {scenario_path}: {response['error']}")
+    return PairDigest.from_dict(response["digest"])
+
+
+def reference_sensor_digests(scenario_path: str, los: bool, ranges: list[tuple[int, int]],
+                             socket_path: str | None = None, timeout: float | None = None,
+                             in_process: bool = True) -> dict[int, int] | None:
+    """
+    Returns the reference per-sensor digests of the sensors in the [start, stop) id ranges. Only those sensors are
+    queried, so this is cheap next to a full digest. Falls back and times out like reference_digest.
+    """
+    try:
+        response = request({"op": "sensors", "path": scenario_path, "los": los, "ranges": ranges},
+                           socket_path or DEFAULT_SOCKET_PATH, timeout)
+    except TimeoutError:
+        raise
+    except (OSError, AttributeError):
+        return ScenarioIndex(scenario_path).sensor_digests(ranges, los) if in_process else None
+    if not response["ok"]:
+        raise RuntimeError(f"Reference daemon failed on {scenario_path}: {response['error']}")
+    return {int(sensor_id): int(value, 16) for sensor_id, value in response["result"].items()}
+
+
+def main() -> int:
+    """
+    Command line interface. `serve` runs the daemon in the foreground; every other command sends one request to a
+    running daemon and prints the JSON response.
+    """
+    parser = argparse.ArgumentParser(prog="python -m python_benchmarks.daemon",
+                                     description="Keeps scenarios and their grids in memory to answer reference "
+                                                 "queries quickly.")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET_PATH, help="Path of the Unix socket.")
+    commands = parser.add_subparsers(dest="op", required=True)
+    serve_parser = commands.add_parser("serve", help="Run the daemon in the foreground.")
+    serve_parser.add_argument("--max-entities", type=int, default=DEFAULT_MAX_ENTITIES,
+                              help="Entities kept in memory before the least recently used scenario is dropped.")
+    for op in ("load", "count", "digest"):
+        command = commands.add_parser(op, help=f"Send a {op} request for a scenario.")
+        command.add_argument("path")
+        command.add_argument("--los", action="store_true", help="Apply line of sight tests.")
+    targets_parser = commands.add_parser("targets", help="List the targets seen by one sensor.")
+    targets_parser.add_argument("path")
+    targets_parser.add_argument("sensor", type=int)
+    targets_parser.add_argument("--los", action="store_true", help="Apply line of sight tests.")
+    evict_parser = commands.add_parser("evict", help="Drop a scenario (or all of them) from the cache.")
+    evict_parser.add_argument("path", nargs="?")
+    commands.add_parser("ping", help="Check that the daemon is running.")
+    commands.add_parser("stats", help="Print the cache counters.")
+    commands.add_parser("stop", help="Shut the daemon down.")
+    args = parser.parse_args()
+
+    if args.op == "serve":
+        serve(args.socket, args.max_entities)
+        return 0
+    payload = {key: value for key, value in vars(args).items() if key != "socket" and value is not None}
+    if args.op == "stop":
+        payload["op"] = "shutdown"
+    try:
+        response = request(payload, args.socket)
+    except OSError as error:
+        print(f"No reference daemon on {args.socket}: {error}", file=sys.stderr)
+        return 1
+    print(json.dumps(response, indent=4))
+    return 0 if response["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,8 @@
+from . import assignment
+from . import network
+from . import flow
+from . import routing
+from .assignment import AssignmentResult, solve_assignment
+from .network import CSRGraph, build_proximity_graph
+from .flow import max_flow
+from .routing import RoutingResult, route_loads
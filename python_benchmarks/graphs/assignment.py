@@ -0,0 +1,92 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class AssignmentResult:
+    """ The optimal objective of a weapon-target assignment and the chosen weapon -> target pairs. """
+    objective: int
+    assignment: dict[int, int] = field(default_factory=dict)
+
+
+def solve_assignment(num_weapons: int, num_targets: int, edges: list[tuple[int, int, int]]) -> AssignmentResult:
+    """
+    Solves the weapon-target assignment exactly: every weapon engages at most one target, every target is engaged by
+    at most one weapon, and the sum of the integer weights of the (weapon, target, weight) edges used is maximal.
+
+    The problem is a sparse maximum weight bipartite matching. It is solved with Bertsekas' auction algorithm and
+    epsilon scaling, so memory and time grow with the number of edges instead of weapons * targets. To make the
+    matching perfect (which the auction needs) without adding dense edges, the problem is symmetrized:
+      * weapon i may also take its own dummy object (weight 0), meaning "unassigned",
+      * every target j gets a dummy person which may take target j (weight 0), or the dummy object of any weapon
+        adjacent to j. If weapon i engages target j, the dummy of target j takes the dummy object of weapon i.
+    With weights scaled by n + 1 and a final epsilon of 1, the epsilon optimal auction result is optimal.
+    """
+    # --- Keep the best weight for each (weapon, target) pair; edges that cannot improve the objective are dropped ---
+    weights: dict[tuple[int, int], int] = dict()
+    for weapon, target, weight in edges:
+        if weight > 0 and weight > weights.get((weapon, target), 0):
+            weights[(weapon, target)] = weight
+
+    # --- Persons: weapons, then target dummies. Objects: targets, then weapon dummies ---
+    num_persons = num_weapons + num_targets
+    scale = num_persons + 1
+    adjacency: list[list[tuple[int, int]]] = [[] for _ in range(num_persons)]
+    for weapon in range(num_weapons):
+        adjacency[weapon].append((num_targets + weapon, 0))
+    for target in range(num_targets):
+        adjacency[num_weapons + target].append((target, 0))
+    for (weapon, target), weight in weights.items():
+        adjacency[weapon].append((target, weight * scale))
+        adjacency[num_weapons + target].append((num_targets + weapon, 0))
+
+    # --- Epsilon scaling. Prices carry over between phases, the assignment does not ---
+    prices = [0] * num_persons
+    owner = [-1] * num_persons
+    assigned = [-1] * num_persons
+    epsilon = max(1, max(weights.values(), default=0) * scale // 4)
+    while True:
+        _auction_phase(adjacency, prices, owner, assigned, epsilon)
+        if epsilon == 1:
+            break
+        epsilon = max(1, epsilon // 5)
+
+    assignment = {weapon: assigned[weapon] for weapon in range(num_weapons) if assigned[weapon] < num_targets}
+    objective = sum(weights[(weapon, target)] for weapon, target in assignment.items())
+    return AssignmentResult(objective, assignment)
+
+
+def _auction_phase(adjacency: list[list[tuple[int, int]]], prices: list[int], owner: list[int], assigned: list[int],
+                   epsilon: int) -> None:
+    """ Runs one Gauss-Seidel forward auction until every person holds an object. """
+    for i in range(len(owner)):
+        owner[i] = -1
+        assigned[i] = -1
+    unassigned = list(range(len(adjacency)))
+
+    while unassigned:
+        person = unassigned.pop()
+
+        # --- Find the best and second best net value ---
+        best_object = -1
+        best_value = second_value = None
+        for obj, benefit in adjacency[person]:
+            value = benefit - prices[obj]
+            if best_value is None or value > best_value:
+                second_value = best_value
+                best_value = value
+                best_object = obj
+            elif second_value is None or value > second_value:
+                second_value = value
+
+        # --- A person with one option owns an object nobody else can use, so any increment works ---
+        if second_value is None:
+            second_value = best_value
+
+        # --- Bid, and evict the previous owner ---
+        prices[best_object] += best_value - second_value + epsilon
+        previous = owner[best_object]
+        owner[best_object] = person
+        assigned[person] = best_object
+        if previous != -1:
+            assigned[previous] = -1
+            unassigned.append(previous)
@@ -0,0 +1,82 @@
+from collections import deque
+from python_benchmarks.graphs.network import CSRGraph
+
+
+def max_flow(graph: CSRGraph, sources: list[int], sinks: list[int]) -> int:
+    """
+    Maximum flow from a set of source nodes to a set of sink nodes, computed with Dinic's algorithm. The sources are
+    fed by a super source and the sinks drain into a super sink, both through arcs of unbounded capacity. Arcs are kept
+    in flat lists where arc a ^ 1 is the residual twin of arc a.
+    """
+    num_nodes = graph.num_nodes + 2
+    super_source, super_sink = num_nodes - 2, num_nodes - 1
+    heads: list[int] = []
+    residual: list[int] = []
+    adjacency: list[list[int]] = [[] for _ in range(num_nodes)]
+
+    def add_arc(tail: int, head: int, capacity: int) -> None:
+        """ Adds an arc and its zero capacity residual twin. """
+        adjacency[tail].append(len(heads))
+        heads.append(head)
+        residual.append(capacity)
+        adjacency[head].append(len(heads))
+        heads.append(tail)
+        residual.append(0)
+
+    for tail in range(graph.num_nodes):
+        for arc in range(graph.offsets[tail], graph.offsets[tail + 1]):
+            add_arc(tail, graph.heads[arc], graph.capacities[arc])
+    unbounded = sum(graph.capacities) + 1
+    for source in sources:
+        add_arc(super_source, source, unbounded)
+    for sink in sinks:
+        add_arc(sink, super_sink, unbounded)
+
+    flow = 0
+    while True:
+        # --- Build the level graph with a BFS from the super source ---
+        level = [-1] * num_nodes
+        level[super_source] = 0
+        queue = deque([super_source])
+        while queue:
+            node = queue.popleft()
+            for arc in adjacency[node]:
+                if residual[arc] > 0 and level[heads[arc]] < 0:
+                    level[heads[arc]] = level[node] + 1
+                    queue.append(heads[arc])
+        if level[super_sink] < 0:
+            return flow
+
+        # --- Find a blocking flow with an iterative DFS ---
+        next_arc = [0] * num_nodes
+        path: list[int] = []
+        node = super_source
+        while True:
+            if node == super_sink:
+                bottleneck = min(residual[arc] for arc in path)
+                for arc in path:
+                    residual[arc] -= bottleneck
+                    residual[arc ^ 1] += bottleneck
+                flow += bottleneck
+                path.clear()
+                node = super_source
+                continue
+
+            arcs = adjacency[node]
+            while next_arc[node] < len(arcs):
+                arc = arcs[next_arc[node]]
+                if residual[arc] > 0 and level[heads[arc]] == level[node] + 1:
+                    break
+                next_arc[node] += 1
+            else:
+                # --- Dead end: drop the node from the level graph and retreat ---
+                if node == super_source:
+                    break
+                level[node] = -1
+                arc = path.pop()
+                node = heads[arc ^ 1]
+                next_arc[node] += 1
+                continue
+
+            path.append(arc)
+            node = heads[arc]
@@ -0,0 +1,101 @@
+import json
+import math
+from dataclasses import dataclass, field
+from typing import Any
+from geometry.float3 import Float3
+from utils.rng import entity_rng
+
+
+@dataclass
+class CSRGraph:
+    """
+    A directed graph in compressed sparse row form. The arcs leaving node u are heads[offsets[u]:offsets[u + 1]], with
+    matching entries in capacities and weights. Node positions are kept so the graph can be drawn and so engines can
+    reuse their spatial code.
+    """
+    positions: list[Float3]
+    offsets: list[int]
+    heads: list[int]
+    capacities: list[int]
+    weights: list[int]
+
+    @property
+    def num_nodes(self) -> int:
+        """ Returns the number of nodes. """
+        return len(self.offsets) - 1
+
+    @property
+    def num_arcs(self) -> int:
+        """ Returns the number of arcs. """
+        return len(self.heads)
+
+    def to_dict(self) -> dict[str, Any]:
+        """ Returns a dictionary representation of the graph. """
+        return {
+            "nodes": [{"x": p.x, "y": p.y, "z": p.z} for p in self.positions],
+            "offsets": self.offsets,
+            "heads": self.heads,
+            "capacities": self.capacities,
+            "weights": self.weights,
+        }
+
+    def write(self, filename: str, **extra: Any) -> None:
+        """
+        Writes the graph and any extra top-level fields to a json file. The CSR arrays are long flat lists of integers,
+        so they are written compactly instead of one value per line.
+        """
+        with open(filename, 'w') as file:
+            json.dump(self.to_dict() | extra, file, separators=(",", ":"))
+
+
+@dataclass
+class _CellGrid:
+    """ Hash grid used to find node pairs within link range. """
+    cell_size: float
+    cells: dict[tuple[int, int, int], list[int]] = field(default_factory=dict)
+
+    def key(self, position: Float3) -> tuple[int, int, int]:
+        """ Returns the cell index of a position. """
+        return (math.floor(position.x / self.cell_size), math.floor(position.y / self.cell_size),
+                math.floor(position.z / self.cell_size))
+
+
+def build_proximity_graph(positions: list[Float3], link_range: float, random_seed: int,
+                          max_capacity: int = 100) -> CSRGraph:
+    """
+    Connects every pair of nodes closer than link_range with two arcs, one per direction. Arc weights are the
+    length in tenths of a unit, rounded up, so weights are integers and agree across engines. Capacities are drawn in
+    1..max_capacity from the node's own stream (see utils.rng), in order of increasing head index, so the graph only
+    depends on the positions and the seed.
+    """
+    grid = _CellGrid(link_range)
+    for node, position in enumerate(positions):
+        grid.cells.setdefault(grid.key(position), []).append(node)
+
+    offsets = [0]
+    heads: list[int] = []
+    capacities: list[int] = []
+    weights: list[int] = []
+    range_squared = link_range * link_range
+    for node, position in enumerate(positions):
+        cx, cy, cz = grid.key(position)
+        neighbors = []
+        for x in range(cx - 1, cx + 2):
+            for y in range(cy - 1, cy + 2):
+                for z in range(cz - 1, cz + 2):
+                    for other in grid.cells.get((x, y, z), ()):
+                        if other == node:
+                            continue
+                        offset = positions[other] - position
+                        distance_squared = offset.dot(offset)
+                        if distance_squared <= range_squared:
+                            neighbors.append((other, distance_squared))
+        neighbors.sort()
+
+        rng = entity_rng(random_seed, "node_arcs", node)
+        for other, distance_squared in neighbors:
+            heads.append(other)
+            capacities.append(rng.randint(1, max_capacity))
+            weights.append(max(1, math.ceil(math.sqrt(distance_squared) * 10)))
+        offsets.append(len(heads))
+    return CSRGraph(positions, offsets, heads, capacities, weights)
@@ -0,0 +1,71 @@
+import heapq
+from dataclasses import dataclass
+from python_benchmarks.graphs.network import CSRGraph
+
+
+@dataclass
+class RoutingResult:
+    """
+    Per-arc loads after routing one unit from every source to every node it can reach, along shortest paths. Ties
+    between equally short paths go to the lowest-numbered arc: every node is reached through the lowest-numbered arc
+    (u, v) with distance[u] + weight == distance[v], so the loads are unique.
+
+    checksum is the sum of load * weight over all arcs. It equals the sum of all shortest path lengths, so it only
+    validates the distances. load_checksum is the sum of (arc + 1) * load over all arcs, modulo 2^64, which validates
+    every per-arc load.
+    """
+    loads: list[int]
+    checksum: int
+    load_checksum: int
+
+
+def route_loads(graph: CSRGraph, sources: list[int]) -> RoutingResult:
+    """
+    Routes the demands of a batch of sources. Each source runs Dijkstra on the CSR arrays and keeps the arc it used to
+    reach every node; the nodes are then visited in reverse settling order so every node passes its subtree size on
+    to the arc it was reached through. That accumulates the loads in O(nodes) per source.
+
+    Weights are at least 1, so every arc on a shortest path leaves a node that is settled earlier. All candidates for
+    the arc a node is reached through are therefore relaxed before the node is settled, and keeping the lowest-numbered
+    one among equally short candidates implements the tie rule of RoutingResult.
+    """
+    tails = [0] * graph.num_arcs
+    for tail in range(graph.num_nodes):
+        for arc in range(graph.offsets[tail], graph.offsets[tail + 1]):
+            tails[arc] = tail
+
+    loads = [0] * graph.num_arcs
+    unreached = float("inf")
+    for source in sources:
+        distance = [unreached] * graph.num_nodes
+        reached_by = [-1] * graph.num_nodes
+        distance[source] = 0
+        settled: list[int] = []
+        heap = [(0, source)]
+        while heap:
+            node_distance, node = heapq.heappop(heap)
+            if node_distance > distance[node]:
+                continue
+            settled.append(node)
+            for arc in range(graph.offsets[node], graph.offsets[node + 1]):
+                head = graph.heads[arc]
+                candidate = node_distance + graph.weights[arc]
+                if candidate < distance[head]:
+                    distance[head] = candidate
+                    reached_by[head] = arc
+                    heapq.heappush(heap, (candidate, head))
+                elif candidate == distance[head] and arc < reached_by[head]:
+                    reached_by[head] = arc
+
+        # --- Accumulate subtree sizes onto the shortest path tree arcs ---
+        subtree = [1] * graph.num_nodes
+        for node in reversed(settled):
+            arc = reached_by[node]
+            if arc < 0:
+                continue
+            loads[arc] += subtree[node]
+            subtree[tails[arc]] += subtree[node]
+
+    checksum = sum(load * weight for load, weight in zip(loads, graph.weights))
+    load_checksum = sum((arc + 1) * load for arc, load in enumerate(loads)) % (1 << 64)
+    return RoutingResult(loads, checksum, load_checksum)
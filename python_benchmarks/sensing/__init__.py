@@ -1,2 +1,7 @@
 from . import naive
-from . import spatial_hashing
\ No newline at end of file
+from . import spatial_hashing
+from . import profiling
+from . import visibility
+from .profiling import SensingProfile, profile_sensing
+from .loader import load_scenario
+from .visibility import VisibilityCache
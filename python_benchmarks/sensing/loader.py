@@ -0,0 +1,15 @@
+from sim_objects.agent import Agent
+from sim_objects.base import SimObject
+from sim_objects.occluder import Occluder
+from utils.ordering import SpatialOrder, spatial_sort
+
+
+def load_scenario(file_path: str, spatial_order: SpatialOrder = SpatialOrder.NONE,
+                  bits: int = 10) -> tuple[list[Agent], list[Occluder]]:
+    """
+    Loads the agents and occluders of a geometry scenario for the reference kernels. With a spatial_order, both lists
+    are sorted along that curve exactly like the generator would have written them, so the effect of memory layout on
+    a kernel can be measured on the same scenario. Results do not change, because the kernels report pairs by id.
+    """
+    objects = SimObject.read_objects(file_path, agents=Agent, occluders=Occluder)
+    return spatial_sort(objects["agents"], spatial_order, bits), spatial_sort(objects["occluders"], spatial_order, bits)
@@ -1,21 +1,69 @@
 from sim_objects import agent, occluder
 from geometry.float3 import Float3
 import math
-from python_benchmarks.sensing.utils import can_sensor_see_target
+from python_benchmarks.sensing.utils import can_sensor_see_target, segment_hits_occluder
+from python_benchmarks.sensing import profiling
+from typing import Iterator
+from utils.digest import DIGEST_BLOCK_SIZE, PairDigest
 
 def get_targets_no_los(agents: list[agent.Agent]) -> int:
     """
     A brute force algorithm to find targets *without* line of sight checks.
     """
     num_targets = 0
+    with profiling.phase("narrow_phase"):
+        for sensor in agents:
+            for target in agents:
+                if can_sensor_see_target(sensor, target):
+                    num_targets += 1
+
+    profile = profiling.active()
+    if profile is not None:
+        profile.count("queries", len(agents))
+        profile.count("candidates_tested", len(agents) ** 2)
+        profile.count("hits", num_targets)
+    return num_targets
+
+def get_sensed_pairs(agents: list[agent.Agent],
+                     occluders: list[occluder.Occluder] | None = None) -> Iterator[tuple[int, int]]:
+    """
+    A brute force version of spatial_hashing.get_sensed_pairs. Streams every (sensor id, target id) pair, tested
+    against every occluder when occluders are given.
+    """
     for sensor in agents:
         for target in agents:
-            if can_sensor_see_target(sensor, target):
-                num_targets += 1
-    return num_targets
+            if can_sensor_see_target(sensor, target) and not any(
+                    segment_hits_occluder(sensor.position, target.position, blocker) for blocker in occluders or ()):
+                yield sensor.id, target.id
+
+def get_pairs_digest(agents: list[agent.Agent], occluders: list[occluder.Occluder] | None = None,
+                     block_size: int = DIGEST_BLOCK_SIZE) -> PairDigest:
+    """
+    A brute force version of spatial_hashing.get_pairs_digest.
+    """
+    return PairDigest(block_size).add_pairs(get_sensed_pairs(agents, occluders))
 
 def get_targets_with_los(agents: list[agent.Agent], occluders: list[occluder.Occluder]) -> int:
     """
-    A brute force algorithm to find targets *with* line of sight checks. (Stub).
+    A brute force algorithm to find targets *with* line of sight checks. Every sensed target is tested against every
+    occluder.
     """
-    return 0
\ No newline at end of file
+    num_targets = 0
+    num_sensed = 0
+    with profiling.phase("narrow_phase"):
+        for sensor in agents:
+            for target in agents:
+                if not can_sensor_see_target(sensor, target):
+                    continue
+                num_sensed += 1
+                if not any(segment_hits_occluder(sensor.position, target.position, blocker) for blocker in occluders):
+                    num_targets += 1
+
+    profile = profiling.active()
+    if profile is not None:
+        profile.count("queries", len(agents))
+        profile.count("candidates_tested", len(agents) ** 2)
+        profile.count("los_tests", num_sensed)
+        profile.count("occluders_tested", num_sensed * len(occluders))
+        profile.count("hits", num_targets)
+    return num_targets
@@ -0,0 +1,107 @@
+import io
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field, asdict
+from typing import Any, Iterator
+
+
+@dataclass
+class SensingProfile:
+    """
+    Collects per-phase wall clock times (seconds) and counters from the sensing kernels. The kernels look up the active
+    profile once per call, so a disabled profile costs a single global lookup per kernel invocation.
+    """
+    phases: dict[str, float] = field(default_factory=dict)
+    counters: dict[str, int] = field(default_factory=dict)
+    cprofile_stats: str | None = None
+    memory_peak_bytes: int | None = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """ Adds the time spent inside the block to the named phase. """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def add_time(self, name: str, seconds: float) -> None:
+        """ Adds time to the named phase. """
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def count(self, name: str, amount: int = 1) -> None:
+        """ Adds to the named counter. """
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def to_dict(self) -> dict[str, Any]:
+        """ Returns the profile with derived statistics, ready to be dumped as json. """
+        data = asdict(self)
+        queries = self.counters.get("queries", 0)
+        candidates = self.counters.get("candidates_tested", 0)
+        pruned = self.counters.get("candidates_pruned", 0)
+        data["derived"] = {
+            "avg_candidates_per_query": candidates / queries if queries else 0.0,
+            "avg_cells_per_query": self.counters.get("cells_visited", 0) / queries if queries else 0.0,
+            "hit_rate": self.counters.get("hits", 0) / candidates if candidates else 0.0,
+            "candidate_prune_rate": pruned / (candidates + pruned) if candidates + pruned else 0.0,
+        }
+        return data
+
+    def to_json(self, indent: int | None = 4) -> str:
+        """ Returns the profile as a json string. """
+        return json.dumps(self.to_dict(), indent=indent)
+
+
+# --- The profile the kernels report into. None means profiling is disabled ---
+_active_profile: SensingProfile | None = None
+_null_phase = nullcontext()
+
+
+def active() -> SensingProfile | None:
+    """ Returns the active profile, or None when profiling is disabled. """
+    return _active_profile
+
+
+def phase(name: str):
+    """ Times a block into the active profile. A no-op context manager when profiling is disabled. """
+    profile = _active_profile
+    return profile.phase(name) if profile is not None else _null_phase
+
+
+@contextmanager
+def profile_sensing(cprofile: bool = False, trace_memory: bool = False, top: int = 25) -> Iterator[SensingProfile]:
+    """
+    Enables profiling of the sensing kernels for the duration of the block and yields the profile that collects the
+    results. Optionally runs cProfile (the top functions by cumulative time are stored as text) and tracemalloc (the
+    peak traced memory is stored in bytes). Profiles can be nested; the inner one is active inside its block.
+    """
+    global _active_profile
+    import cProfile  # Deferred: profiling is off by default, so its tools are only imported when it is enabled
+    import pstats
+    import tracemalloc
+    profile = SensingProfile()
+    previous = _active_profile
+    profiler = cProfile.Profile() if cprofile else None
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if trace_memory:
+        tracemalloc.reset_peak()
+
+    _active_profile = profile
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield profile
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(top)
+            profile.cprofile_stats = stream.getvalue()
+        if trace_memory:
+            profile.memory_peak_bytes = tracemalloc.get_traced_memory()[1]
+        if started_tracing:
+            tracemalloc.stop()
+        _active_profile = previous
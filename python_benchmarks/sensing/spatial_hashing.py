@@ -2,8 +2,12 @@ from sim_objects.agent import Agent
 from sim_objects.occluder import Occluder
 from geometry.float3 import Float3
 from geometry.aabb import AABB
-from python_benchmarks.sensing.utils import can_sensor_see_target
-from typing import NamedTuple
+from python_benchmarks.sensing.utils import can_sensor_see_target, occluder_radius, segment_hits_occluder
+from python_benchmarks.sensing import profiling
+from utils.digest import DIGEST_BLOCK_SIZE, PairDigest
+from typing import Iterable, Iterator, NamedTuple
+import math
+import time
 
 class Int3(NamedTuple):
     """
@@ -23,6 +27,9 @@ class SpatialGrid:
     grid: list[list[list[list[Agent]]]]
     dims: Int3
     entity_count: int = 0
+    cells_visited: int = 0
+    cells_pruned: int = 0
+    candidates_pruned: int = 0
 
     def __init__(self, aabb, cell_size) -> None:
         self.aabb = aabb
@@ -52,54 +59,377 @@ class SpatialGrid:
         self.grid[idx.x][idx.y][idx.z].append(agent)
         self.entity_count += 1
 
-    def query_grid(self, position: Float3, view_range: float) -> list[Agent]:
-        """ Executes a sphere overlap query against the grid and returns a list of agents."""
-        # --- Get the center index and the spread ---
-        d_idx = int(view_range // self.cell_size)
+    def query_grid(self, position: Float3, view_range: float, look_direction: Float3 | None = None,
+                   half_angle: float | None = None) -> list[Agent]:
+        """
+        Executes a sphere overlap query against the grid and returns a list of agents. Given the sensor's unit look
+        direction and half angle (degrees), non-empty cells whose bounding sphere misses the sensor's cone or lies out
+        of range are skipped before their agents are collected, and counted in cells_pruned and candidates_pruned.
+
+        A sphere with center offset c and radius r can only touch the cone if it contains the apex or if
+        angle(c, look) <= half_angle + asin(r / |c|), which without trig reads
+        c . look >= cos(half_angle) * sqrt(|c|^2 - r^2) - sin(half_angle) * r. The test is conservative, so no target is
+        lost, and it is only applied for half angles below 90 degrees where the widened angle stays below 180.
+        """
+        # --- Get the center index and the spread. A sphere reaching into part of a cell must visit it ---
+        d_idx = math.ceil(view_range / self.cell_size)
         ctr = self._position_to_index(position)
 
         # --- Set the iterations ranges for the loop with bounds checks ---
         min_x, max_x = max(0, ctr.x - d_idx), min(self.dims.x, ctr.x + d_idx + 1)
         min_y, max_y = max(0, ctr.y - d_idx), min(self.dims.y, ctr.y + d_idx + 1)
         min_z, max_z = max(0, ctr.z - d_idx), min(self.dims.z, ctr.z + d_idx + 1)
+        self.cells_visited += (max_x - min_x) * (max_y - min_y) * (max_z - min_z)
 
-        # --- Iterate through the cells and add to potential target list ---
+        # --- Without a cone, iterate through the cells and add to potential target list ---
         targets_in_range = []
+        if look_direction is None or half_angle is None or half_angle >= 90.0:
+            for x_idx in range(min_x, max_x):
+                for y_idx in range(min_y, max_y):
+                    for z_idx in range(min_z, max_z):
+                        targets_in_range.extend(self.grid[x_idx][y_idx][z_idx])
+            return targets_in_range
+
+        # --- With a cone, skip cells whose bounding sphere is out of range or outside the widened cone ---
+        cos_half = math.cos(math.radians(half_angle))
+        sin_half = math.sin(math.radians(half_angle))
+        radius = self.cell_size * math.sqrt(3.0) / 2.0
+        radius_squared = radius * radius
+        reach_squared = (view_range + radius) ** 2
+        look_x, look_y, look_z = look_direction.x, look_direction.y, look_direction.z
+        origin = self.aabb.min_f3 - position + Float3.one() * (self.cell_size / 2.0)
         for x_idx in range(min_x, max_x):
+            c_x = origin.x + x_idx * self.cell_size
             for y_idx in range(min_y, max_y):
+                c_y = origin.y + y_idx * self.cell_size
                 for z_idx in range(min_z, max_z):
-                    targets_in_range.extend(self.grid[x_idx][y_idx][z_idx])
+                    cell = self.grid[x_idx][y_idx][z_idx]
+                    if not cell:
+                        continue
+                    c_z = origin.z + z_idx * self.cell_size
+                    distance_squared = c_x * c_x + c_y * c_y + c_z * c_z
+                    if distance_squared > radius_squared and (
+                            distance_squared > reach_squared or
+                            c_x * look_x + c_y * look_y + c_z * look_z <
+                            cos_half * math.sqrt(distance_squared - radius_squared) - sin_half * radius):
+                        self.cells_pruned += 1
+                        self.candidates_pruned += len(cell)
+                        continue
+                    targets_in_range.extend(cell)
         return targets_in_range
 
 
-def get_targets_no_los(agents: list[Agent]) -> int:
+class MultiLevelGrid:
     """
-    Gets the count of all targets sensed by agents without los. Does not parse a json configuration file
-    but can be used for internal testing. Assumes that the agent has a sensor that implements view_range.
+    A stack of uniform grids whose cell sizes are the shortest view range times a power of two. Each sensor queries
+    the level with the smallest cell size that covers its view range, so it visits at most 27 cells whatever its range,
+    and a few long range sensors do not force large cells (and many candidates) on all the others. Only the levels
+    some sensor needs are built, and every level holds every agent.
+    """
+    base_cell_size: float
+    levels: dict[int, SpatialGrid]
+
+    def __init__(self, aabb: AABB, base_cell_size: float, view_ranges: Iterable[float]) -> None:
+        self.base_cell_size = base_cell_size
+        self.levels = dict()
+        for view_range in view_ranges:
+            level = self.level_for(view_range)
+            if level not in self.levels:
+                self.levels[level] = SpatialGrid(aabb, base_cell_size * 2 ** level)
+
+    def level_for(self, view_range: float) -> int:
+        """ Returns the level whose cell size is the smallest one not below the view range. """
+        level = 0
+        while self.base_cell_size * 2 ** level < view_range:
+            level += 1
+        return level
+
+    @property
+    def cells_visited(self) -> int:
+        """ Cells visited by all queries, summed over the levels. """
+        return sum(grid.cells_visited for grid in self.levels.values())
+
+    @property
+    def cells_pruned(self) -> int:
+        """ Cells skipped by the cone test, summed over the levels. """
+        return sum(grid.cells_pruned for grid in self.levels.values())
+
+    @property
+    def candidates_pruned(self) -> int:
+        """ Agents in the skipped cells, summed over the levels. """
+        return sum(grid.candidates_pruned for grid in self.levels.values())
+
+    def emplace_agent(self, agent: Agent) -> None:
+        """ Inserts the agent into every level. """
+        for grid in self.levels.values():
+            grid.emplace_agent(agent)
+
+    def query_grid(self, position: Float3, view_range: float, look_direction: Float3 | None = None,
+                   half_angle: float | None = None) -> list[Agent]:
+        """ Executes a (cone culled) sphere overlap query against the level matching the view range. """
+        return self.levels[self.level_for(view_range)].query_grid(position, view_range, look_direction, half_angle)
+
+
+def build_grid(agents: list[Agent]) -> MultiLevelGrid:
+    """
+    Builds a grid around all agents and inserts them. The finest level uses the shortest view range as its cell
+    size; when all agents share one view range, this is a single uniform grid.
     """
     # --- Get the world AABB ---
     world_aabb = AABB.empty()
     for agent in agents:
         world_aabb.expand_point(agent.position)
 
-    # --- Make and populate the spatial grid ---
-    cell_size = agents[0].sensor.view_range # Only efficient if agents all have same view range
-    spatial_grid = SpatialGrid(world_aabb, cell_size)
+    # --- Make and populate the grid levels ---
+    view_ranges = {agent.sensor.view_range for agent in agents}
+    spatial_grid = MultiLevelGrid(world_aabb, min(view_ranges), view_ranges)
     for agent in agents:
         spatial_grid.emplace_agent(agent)
+    return spatial_grid
+
+
+class OccluderGrid:
+    """
+    Sparse hash grid over the occluders, used for line of sight tests. Each occluder is stored in every cell that the
+    box around its bounding sphere overlaps, and a segment walks exactly the cells it passes through (a 3D DDA, after
+    Amanatides & Woo), so a test only looks at occluders near the line. Occluders can be moved, which reports the
+    cells they left and entered (see visibility.VisibilityCache).
+    """
+    cell_size: float
+    cells: dict[tuple[int, int, int], list[Occluder]]
+    occluder_cells: dict[int, list[tuple[int, int, int]]]
+    cells_visited: int = 0
+    occluders_tested: int = 0
+
+    def __init__(self, cell_size: float) -> None:
+        self.cell_size = cell_size
+        self.cells = dict()
+        self.occluder_cells = dict()
+
+    def _cell(self, position: Float3) -> tuple[int, int, int]:
+        """ Returns the index of the cell containing a position. """
+        return (math.floor(position.x / self.cell_size), math.floor(position.y / self.cell_size),
+                math.floor(position.z / self.cell_size))
+
+    def emplace_occluder(self, occluder: Occluder) -> None:
+        """ Inserts the occluder into every cell overlapped by its bounding box. """
+        extent = Float3.one() * occluder_radius(occluder)
+        low = self._cell(occluder.position - extent)
+        high = self._cell(occluder.position + extent)
+        covered = [(x_idx, y_idx, z_idx) for x_idx in range(low[0], high[0] + 1)
+                   for y_idx in range(low[1], high[1] + 1) for z_idx in range(low[2], high[2] + 1)]
+        for cell in covered:
+            self.cells.setdefault(cell, []).append(occluder)
+        self.occluder_cells[occluder.id] = covered
+
+    def remove_occluder(self, occluder: Occluder) -> list[tuple[int, int, int]]:
+        """ Removes the occluder from the cells it was inserted into and returns those cells. """
+        covered = self.occluder_cells.pop(occluder.id)
+        for cell in covered:
+            occupants = self.cells[cell]
+            occupants.remove(occluder)
+            if not occupants:
+                del self.cells[cell]
+        return covered
+
+    def move_occluder(self, occluder: Occluder) -> set[tuple[int, int, int]]:
+        """ Re-inserts an occluder after its position or rotation changed. Returns the cells it left or entered. """
+        touched = set(self.remove_occluder(occluder))
+        self.emplace_occluder(occluder)
+        return touched.union(self.occluder_cells[occluder.id])
+
+    def segment_cells(self, start: Float3, end: Float3) -> Iterator[tuple[int, int, int]]:
+        """ Yields the cells crossed by the segment from start to end, in order. """
+        cell = list(self._cell(start))
+        last = self._cell(end)
+
+        # --- Per axis: direction of travel, segment parameter of the next cell boundary and of one cell ---
+        steps, t_next, t_delta = [0, 0, 0], [math.inf] * 3, [math.inf] * 3
+        for axis, (origin, delta) in enumerate(((start.x, end.x - start.x), (start.y, end.y - start.y),
+                                                 (start.z, end.z - start.z))):
+            if delta > 0:
+                steps[axis] = 1
+                t_next[axis] = ((cell[axis] + 1) * self.cell_size - origin) / delta
+                t_delta[axis] = self.cell_size / delta
+            elif delta < 0:
+                steps[axis] = -1
+                t_next[axis] = (cell[axis] * self.cell_size - origin) / delta
+                t_delta[axis] = -self.cell_size / delta
 
-    # --- Query the spatial grid ---
+        # --- Walk the cells until the segment ends ---
+        while True:
+            current = (cell[0], cell[1], cell[2])
+            yield current
+            if current == last:
+                return
+            axis = min(range(3), key=t_next.__getitem__)
+            if t_next[axis] > 1.0:
+                return
+            cell[axis] += steps[axis]
+            t_next[axis] += t_delta[axis]
+
+    def is_blocked(self, start: Float3, end: Float3, cells: Iterable[tuple[int, int, int]] | None = None) -> bool:
+        """
+        Checks whether any occluder intersects the segment from start to end. The cells of the segment can be passed in
+        when they are already known.
+        """
+        if not self.cells:
+            return False
+        for cell in cells if cells is not None else self.segment_cells(start, end):
+            self.cells_visited += 1
+            for occluder in self.cells.get(cell, ()):
+                self.occluders_tested += 1
+                if segment_hits_occluder(start, end, occluder):
+                    return True
+        return False
+
+
+def build_occluder_grid(occluders: list[Occluder], cell_size: float) -> OccluderGrid:
+    """ Builds an occluder grid and inserts all occluders. """
+    occluder_grid = OccluderGrid(cell_size)
+    for occluder in occluders:
+        occluder_grid.emplace_occluder(occluder)
+    return occluder_grid
+
+
+def los_cell_size(agents: list[Agent]) -> float:
+    """ Cell size of the occluder grid: a quarter of the shortest view range, so a sight line crosses few cells. """
+    return min(agent.sensor.view_range for agent in agents) / 4.0
+
+
+def get_sensed_pairs(agents: list[Agent], occluders: list[Occluder] | None = None,
+                     spatial_grid: MultiLevelGrid | None = None,
+                     occluder_grid: OccluderGrid | None = None,
+                     sensors: list[Agent] | None = None) -> Iterator[tuple[int, int]]:
+    """
+    Streams every (sensor id, target id) pair where the sensor sees the target. Given occluders, only pairs with a
+    clear line of sight are produced. Ids are the agents' id fields, so the pairs do not depend on the order of the
+    list. Pairs are produced sensor by sensor and are never all held in memory at once. Prebuilt grids can be passed
+    in to skip building them (see python_benchmarks.daemon). Given sensors (a subset of agents), only their pairs
+    are produced, e.g. to narrow down a digest mismatch.
+    """
+    if spatial_grid is None:
+        spatial_grid = build_grid(agents)
+    if occluder_grid is None and occluders:
+        occluder_grid = build_occluder_grid(occluders, los_cell_size(agents))
+    for agent in agents if sensors is None else sensors:
+        for target in spatial_grid.query_grid(agent.position, agent.sensor.view_range, agent.sensor.look_direction,
+                                              agent.sensor.field_of_view / 2):
+            if can_sensor_see_target(agent, target) and (
+                    occluder_grid is None or not occluder_grid.is_blocked(agent.position, target.position)):
+                yield agent.id, target.id
+
+
+def get_pairs_digest(agents: list[Agent], occluders: list[Occluder] | None = None,
+                     block_size: int = DIGEST_BLOCK_SIZE) -> PairDigest:
+    """
+    Digest of the pairs counted by get_targets_no_los (or get_targets_with_los, given occluders), keyed by agent id.
+    The pairs are streamed into the digest, so memory stays O(agents) however many pairs there are.
+    """
+    return PairDigest(block_size).add_pairs(get_sensed_pairs(agents, occluders))
+
+
+def get_targets_no_los(agents: list[Agent]) -> int:
+    """
+    Gets the count of all targets sensed by agents without los. Does not parse a json configuration file
+    but can be used for internal testing. Assumes that the agent has a sensor that implements view_range; the view
+    ranges may differ between agents (see MultiLevelGrid).
+    When profiling is enabled (see profiling.profile_sensing) the grid build, broad phase and narrow phase are
+    timed separately and the query counters are recorded, including the cells and candidates removed by cone culling.
+    """
+    profile = profiling.active()
+    with profiling.phase("grid_build"):
+        spatial_grid = build_grid(agents)
+
+    # --- Without profiling, query the spatial grid in a loop that carries no instrumentation at all ---
     num_targets = 0
+    if profile is None:
+        for agent in agents:
+            for target in spatial_grid.query_grid(agent.position, agent.sensor.view_range,
+                                                  agent.sensor.look_direction, agent.sensor.field_of_view / 2):
+                if can_sensor_see_target(agent, target):
+                    num_targets += 1
+        return num_targets
+
+    # --- Query the spatial grid, timing the broad and narrow phases ---
+    num_candidates = 0
+    broad_phase_time = 0.0
+    narrow_phase_time = 0.0
     for agent in agents:
-        targets = spatial_grid.query_grid(agent.position, agent.sensor.view_range)
+        start = time.perf_counter()
+        targets = spatial_grid.query_grid(agent.position, agent.sensor.view_range, agent.sensor.look_direction,
+                                          agent.sensor.field_of_view / 2)
+        middle = time.perf_counter()
+        num_candidates += len(targets)
         for target in targets:
             if can_sensor_see_target(agent, target):
                 num_targets += 1
+        narrow_phase_time += time.perf_counter() - middle
+        broad_phase_time += middle - start
+
+    profile.add_time("broad_phase", broad_phase_time)
+    profile.add_time("narrow_phase", narrow_phase_time)
+    profile.count("queries", len(agents))
+    profile.count("cells_visited", spatial_grid.cells_visited)
+    profile.count("cells_pruned", spatial_grid.cells_pruned)
+    profile.count("candidates_pruned", spatial_grid.candidates_pruned)
+    profile.count("candidates_tested", num_candidates)
+    profile.count("hits", num_targets)
     return num_targets
 
 
 def get_targets_with_los(agents: list[Agent], occluders: list[Occluder]) -> int:
     """
-    Gets total number of targets accounting for line of sight checks. (Stub).
+    Gets total number of targets accounting for line of sight checks. A sensed target counts if no occluder
+    intersects the segment between the two agents. When profiling is enabled, the line of sight tests are timed in
+    their own phase and counted (los_tests, los_blocked, los_cells_visited, occluders_tested).
     """
-    return 0
\ No newline at end of file
+    profile = profiling.active()
+    with profiling.phase("grid_build"):
+        spatial_grid = build_grid(agents)
+        occluder_grid = build_occluder_grid(occluders, los_cell_size(agents))
+
+    # --- Without profiling, count in a loop that carries no instrumentation at all ---
+    num_targets = 0
+    if profile is None:
+        for agent in agents:
+            for target in spatial_grid.query_grid(agent.position, agent.sensor.view_range,
+                                                  agent.sensor.look_direction, agent.sensor.field_of_view / 2):
+                if can_sensor_see_target(agent, target) and not occluder_grid.is_blocked(agent.position,
+                                                                                          target.position):
+                    num_targets += 1
+        return num_targets
+
+    # --- Query the spatial grid, then test the line of sight of every sensed target, timing each phase ---
+    num_sensed = 0
+    num_candidates = 0
+    broad_phase_time = 0.0
+    narrow_phase_time = 0.0
+    for agent in agents:
+        start = time.perf_counter()
+        targets = spatial_grid.query_grid(agent.position, agent.sensor.view_range, agent.sensor.look_direction,
+                                          agent.sensor.field_of_view / 2)
+        middle = time.perf_counter()
+        num_candidates += len(targets)
+        sensed = [target for target in targets if can_sensor_see_target(agent, target)]
+        end = time.perf_counter()
+        num_sensed += len(sensed)
+        for target in sensed:
+            if not occluder_grid.is_blocked(agent.position, target.position):
+                num_targets += 1
+        narrow_phase_time += end - middle
+        broad_phase_time += middle - start
+
+    profile.add_time("broad_phase", broad_phase_time)
+    profile.add_time("narrow_phase", narrow_phase_time)
+    profile.count("queries", len(agents))
+    profile.count("cells_visited", spatial_grid.cells_visited)
+    profile.count("cells_pruned", spatial_grid.cells_pruned)
+    profile.count("candidates_pruned", spatial_grid.candidates_pruned)
+    profile.count("candidates_tested", num_candidates)
+    profile.count("los_tests", num_sensed)
+    profile.count("los_blocked", num_sensed - num_targets)
+    profile.count("los_cells_visited", occluder_grid.cells_visited)
+    profile.count("occluders_tested", occluder_grid.occluders_tested)
+    profile.count("hits", num_targets)
+    return num_targets
\ No newline at end of file
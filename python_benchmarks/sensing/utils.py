@@ -1,5 +1,6 @@
 from geometry.float3 import Float3
 from sim_objects.agent import Agent
+from sim_objects.occluder import Occluder
 import math
 
 def can_sensor_see_target(agent: Agent, target: Agent) -> bool:
@@ -18,4 +19,37 @@ def can_sensor_see_target(agent: Agent, target: Agent) -> bool:
         return True
 
     # --- Otherwise, we can't see it
-    return False
\ No newline at end of file
+    return False
+
+
+def occluder_radius(occluder: Occluder) -> float:
+    """ Radius of the bounding sphere of an occluder. A cube has edge length scale. """
+    if occluder.shape != "cube":
+        raise ValueError(f"Unsupported occluder shape: {occluder.shape}")
+    return occluder.scale * math.sqrt(3.0) / 2.0
+
+
+def segment_hits_occluder(start: Float3, end: Float3, occluder: Occluder) -> bool:
+    """
+    Checks whether the segment from start to end intersects an occluder. A cube occluder is centered on its position,
+    has edge length scale and is oriented by its rotation. The segment is moved into the cube's frame and clipped
+    against the three slabs of the cube (the slab test).
+    """
+    half = occluder.scale / 2.0
+    inverse = occluder.rotation.conjugate()
+    origin = inverse.rotate(start - occluder.position)
+    direction = inverse.rotate(end - start)
+
+    t_min, t_max = 0.0, 1.0
+    for o, d in ((origin.x, direction.x), (origin.y, direction.y), (origin.z, direction.z)):
+        if abs(d) < 1e-12:
+            if o < -half or o > half:
+                return False
+            continue
+        t_near, t_far = (-half - o) / d, (half - o) / d
+        if t_near > t_far:
+            t_near, t_far = t_far, t_near
+        t_min, t_max = max(t_min, t_near), min(t_max, t_far)
+        if t_min > t_max:
+            return False
+    return True
\ No newline at end of file
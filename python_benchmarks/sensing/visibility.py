@@ -0,0 +1,145 @@
+from sim_objects.agent import Agent
+from sim_objects.occluder import Occluder
+from python_benchmarks.sensing.utils import can_sensor_see_target
+from python_benchmarks.sensing import spatial_hashing
+from python_benchmarks.sensing.spatial_hashing import MultiLevelGrid, OccluderGrid
+from typing import Iterable, Iterator
+
+type Cell = tuple[int, int, int]
+type Pair = tuple[int, int]
+
+
+class VisibilityCache:
+    """
+    Keeps the visible targets of every sensor valid across updates, so line of sight is only re-tested where
+    something changed. Every sensed pair (in range and field of view, blocked or not) is stored with the occluder
+    grid cells its segment crosses, and each cell lists the pairs crossing it.
+
+    After the first full evaluation, update() takes the entities that moved since the last call:
+      - a moved occluder dirties the cells it left and entered, and only the pairs crossing those cells are re-tested;
+      - a moved agent drops all its pairs, then is evaluated again as a sensor and as a target.
+    A static scenario therefore costs one evaluation however many updates it runs, and an update with nothing moved
+    costs nothing. The counters (sensors_evaluated, los_tests, pairs_retested) show how much work was done.
+    """
+    agents_by_id: dict[int, Agent]
+    spatial_grid: MultiLevelGrid
+    occluder_grid: OccluderGrid
+    visible: dict[int, set[int]]
+    sensed: dict[int, set[int]]
+    sensed_by: dict[int, set[int]]
+    pair_cells: dict[Pair, list[Cell]]
+    crossing: dict[Cell, set[Pair]]
+    num_visible: int = 0
+    sensors_evaluated: int = 0
+    los_tests: int = 0
+    pairs_retested: int = 0
+
+    def __init__(self, agents: list[Agent], occluders: list[Occluder], cell_size: float | None = None):
+        self.agents_by_id = {agent.id: agent for agent in agents}
+        self.max_view_range = max(agent.sensor.view_range for agent in agents)
+        self.spatial_grid = spatial_hashing.build_grid(agents)
+        self.occluder_grid = spatial_hashing.build_occluder_grid(
+            occluders, cell_size or spatial_hashing.los_cell_size(agents))
+        self.visible = {agent.id: set() for agent in agents}
+        self.sensed = {agent.id: set() for agent in agents}
+        self.sensed_by = {agent.id: set() for agent in agents}
+        self.pair_cells = dict()
+        self.crossing = dict()
+        for agent in agents:
+            self._evaluate_sensor(agent)
+
+    def count(self) -> int:
+        """ Number of (sensor, target) pairs with a clear line of sight. """
+        return self.num_visible
+
+    def pairs(self) -> Iterator[Pair]:
+        """ Streams every visible (sensor id, target id) pair, e.g. into a utils.digest.PairDigest. """
+        for sensor_id, targets in self.visible.items():
+            for target_id in targets:
+                yield sensor_id, target_id
+
+    def update(self, moved_agents: Iterable[Agent] = (), moved_occluders: Iterable[Occluder] = ()) -> int:
+        """
+        Brings the cache up to date after the given entities moved (their position or rotation was changed in place)
+        and returns the new count.
+        """
+        # --- Move the occluders in the grid and collect the pairs crossing the cells they touched ---
+        dirty_cells: set[Cell] = set()
+        for occluder in moved_occluders:
+            dirty_cells |= self.occluder_grid.move_occluder(occluder)
+        dirty_pairs = set().union(*(self.crossing.get(cell, ()) for cell in dirty_cells))
+
+        # --- Re-evaluate moved agents. The agent grid is rebuilt, which is cheap next to the line of sight tests ---
+        moved = list(moved_agents)
+        moved_ids = {agent.id for agent in moved}
+        if moved:
+            self.spatial_grid = spatial_hashing.build_grid(list(self.agents_by_id.values()))
+            for agent in moved:
+                for target_id in list(self.sensed[agent.id]):
+                    self._remove_pair((agent.id, target_id))
+                for sensor_id in list(self.sensed_by[agent.id]):
+                    self._remove_pair((sensor_id, agent.id))
+            for agent in moved:
+                self._evaluate_sensor(agent)
+            for agent in moved:
+                self._evaluate_target(agent, moved_ids)
+
+        # --- Re-test the pairs whose segment crosses a dirty cell and was not rebuilt above ---
+        for pair in dirty_pairs:
+            if pair in self.pair_cells and pair[0] not in moved_ids and pair[1] not in moved_ids:
+                self.pairs_retested += 1
+                self._set_visible(pair, not self._is_blocked(pair))
+        return self.num_visible
+
+    def _evaluate_sensor(self, agent: Agent) -> None:
+        """ Adds every pair in which the agent is the sensor. """
+        self.sensors_evaluated += 1
+        sensor = agent.sensor
+        for target in self.spatial_grid.query_grid(agent.position, sensor.view_range, sensor.look_direction,
+                                                   sensor.field_of_view / 2):
+            if can_sensor_see_target(agent, target):
+                self._add_pair(agent, target)
+
+    def _evaluate_target(self, agent: Agent, skip: set[int]) -> None:
+        """ Adds every pair in which the agent is the target, except for sensors in skip (already evaluated). """
+        for sensor in self.spatial_grid.query_grid(agent.position, self.max_view_range):
+            if sensor.id not in skip and can_sensor_see_target(sensor, agent):
+                self._add_pair(sensor, agent)
+
+    def _add_pair(self, sensor: Agent, target: Agent) -> None:
+        """ Stores a sensed pair with the cells its segment crosses and tests its line of sight. """
+        pair = (sensor.id, target.id)
+        cells = list(self.occluder_grid.segment_cells(sensor.position, target.position))
+        self.pair_cells[pair] = cells
+        for cell in cells:
+            self.crossing.setdefault(cell, set()).add(pair)
+        self.sensed[sensor.id].add(target.id)
+        self.sensed_by[target.id].add(sensor.id)
+        self._set_visible(pair, not self._is_blocked(pair))
+
+    def _remove_pair(self, pair: Pair) -> None:
+        """ Forgets a sensed pair. """
+        for cell in self.pair_cells.pop(pair):
+            pairs = self.crossing[cell]
+            pairs.discard(pair)
+            if not pairs:
+                del self.crossing[cell]
+        self.sensed[pair[0]].discard(pair[1])
+        self.sensed_by[pair[1]].discard(pair[0])
+        self._set_visible(pair, False)
+
+    def _is_blocked(self, pair: Pair) -> bool:
+        """ Tests the line of sight of a stored pair against the occluders in the cells it crosses. """
+        self.los_tests += 1
+        start, end = self.agents_by_id[pair[0]].position, self.agents_by_id[pair[1]].position
+        return self.occluder_grid.is_blocked(start, end, self.pair_cells[pair])
+
+    def _set_visible(self, pair: Pair, visible: bool) -> None:
+        """ Updates the visible set of the sensor and the running count. """
+        targets = self.visible[pair[0]]
+        if visible and pair[1] not in targets:
+            targets.add(pair[1])
+            self.num_visible += 1
+        elif not visible and pair[1] in targets:
+            targets.discard(pair[1])
+            self.num_visible -= 1
@@ -0,0 +1,122 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+from dataclasses import dataclass, asdict, field
+
+# --- Modules of this project whose import cost we track ---
+PROJECT_MODULES = [
+    "geometry",
+    "sim_objects",
+    "utils",
+    "configuration",
+    "configuration.benchmark_setup",
+    "test_runner",
+    "test_runner.harness",
+    "python_benchmarks.sensing",
+]
+
+# --- Third party packages which must only be imported when they are actually used ---
+HEAVY_MODULES = ["rich", "yaml", "numpy"]
+
+# --- Repository root, so the benchmark works from any working directory ---
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class ImportTiming:
+    """ Import timing of one module. Times are in microseconds and are the minimum over all repeats. """
+    module: str
+    cumulative_us: int
+    self_us: int
+    heavy_imports: list[str] = field(default_factory=list)
+
+
+def measure_import_time(module: str, repeats: int = 5) -> ImportTiming:
+    """ Imports the module in a fresh interpreter `repeats` times and keeps the fastest run. """
+    best: ImportTiming | None = None
+    env = os.environ | {"PYTHONPATH": os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")]))}
+    for _ in range(repeats):
+        completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                   capture_output=True, text=True, cwd=REPO_ROOT, env=env)
+        if completed.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{completed.stderr}")
+        timing = _parse_importtime(module, completed.stderr)
+        if best is None or timing.cumulative_us < best.cumulative_us:
+            best = timing
+    return best
+
+
+def _parse_importtime(module: str, stderr: str) -> ImportTiming:
+    """
+    Parses `-X importtime` output. Each line looks like 'import time: <self> | <cumulative> | <indented name>'. The line
+    of the requested module itself holds the cumulative cost of everything it pulled in.
+    """
+    timing = ImportTiming(module, cumulative_us=0, self_us=0)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        name = name.strip()
+        if name == module:
+            timing.self_us = int(self_us)
+            timing.cumulative_us = int(cumulative_us)
+        if name in HEAVY_MODULES:
+            timing.heavy_imports.append(name)
+    return timing
+
+
+def find_regressions(timings: list[ImportTiming], baseline: dict[str, dict], tolerance: float) -> list[str]:
+    """ Compares timings against a baseline produced by --output and returns a description of each regression. """
+    regressions = []
+    for timing in timings:
+        reference = baseline.get(timing.module)
+        if reference is None:
+            continue
+        limit = reference["cumulative_us"] * (1.0 + tolerance)
+        if timing.cumulative_us > limit:
+            regressions.append(f"{timing.module}: {timing.cumulative_us} us > {limit:.0f} us "
+                               f"(baseline {reference['cumulative_us']} us)")
+        new_heavy = set(timing.heavy_imports) - set(reference["heavy_imports"])
+        if new_heavy:
+            regressions.append(f"{timing.module}: now imports {', '.join(sorted(new_heavy))}")
+    return regressions
+
+
+def main() -> int:
+    """
+    Import-time benchmark for the project's own modules. Every module is imported in a fresh interpreter started with
+    `python -X importtime`, so the numbers match what a user (or a spawned generator child) pays at start-up. Prints a
+    report and returns a non-zero exit code when a baseline is given and a module regressed against it.
+    """
+    parser = argparse.ArgumentParser(prog="python -m python_benchmarks.startup",
+                                     description="Measures the import time of the project's own modules.")
+    parser.add_argument("--repeats", type=int, default=5, help="Fresh interpreters per module; the fastest run is kept.")
+    parser.add_argument("--output", help="Write the timings to this JSON file.")
+    parser.add_argument("--baseline", help="Compare against timings previously written with --output.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown against the baseline.")
+    args = parser.parse_args()
+
+    timings = [measure_import_time(module, args.repeats) for module in PROJECT_MODULES]
+
+    print(f"{'module':<32}{'cumulative (us)':>18}{'self (us)':>12}  heavy imports")
+    for timing in timings:
+        heavy = ", ".join(timing.heavy_imports) or "-"
+        print(f"{timing.module:<32}{timing.cumulative_us:>18}{timing.self_us:>12}  {heavy}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({timing.module: asdict(timing) for timing in timings}, file, indent=4)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = find_regressions(timings, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
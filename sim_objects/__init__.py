@@ -2,5 +2,6 @@ from .agent import Agent
 from .base import SimObject
 from .occluder import Occluder
 from .sensor import Sensor, SphericalSectorSensor
+from .assignment import Weapon, Target
 
-__all__ = ["Agent", "SimObject", "Occluder", "Sensor", "SphericalSectorSensor"]
\ No newline at end of file
+__all__ = ["Agent", "SimObject", "Occluder", "Sensor", "SphericalSectorSensor", "Weapon", "Target"]
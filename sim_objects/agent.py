@@ -16,18 +16,31 @@ class Agent(SimObject):
     sensor: Sensor
 
     @classmethod
-    def random(cls, distribution: SpatialDistribution, speed: float, sensor: Sensor) -> 'Agent':
-        """ Creates a random agent in the simulation drawn from the given distribution. """
-        position = distribution.get_float3()
-        look_direction = Float3.point_on_unit_sphere()
-        rotation = Float4.from_axis(look_direction)
-        random_seed = random.randint(0, 1000000000)
+    def random(cls, distribution: SpatialDistribution, speed: float, sensor: Sensor,
+               rng: random.Random | None = None, entity_id: int = 0) -> 'Agent':
+        """
+        Creates a random agent in the simulation drawn from the given distribution. Pass a per-entity rng (see
+        utils.rng.entity_rng) to make the agent independent of every other draw.
+        """
+        rng = rng if rng is not None else random
+        position = distribution.get_float3(rng)
+        look_direction = Float3.point_on_unit_sphere(rng)
+        rotation = Float4.from_axis(look_direction, rng)
+        random_seed = rng.randint(0, 1000000000)
         new_sensor = deepcopy(sensor)
         new_sensor.look_direction = look_direction
-        return cls("agent", position, rotation, random_seed, speed, new_sensor)
+        return cls("agent", entity_id, position, rotation, random_seed, speed, new_sensor)
 
     def to_dict(self) -> dict[str, Any]:
         """ Returns a dictionary representation of the agent. Flattens sensor data to satisfy standard json interface. """
         data = asdict(self)
         sensor_data = data.pop("sensor")
-        return {**data, **sensor_data}
\ No newline at end of file
+        return {**data, **sensor_data}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> 'Agent':
+        """ Builds an agent from the flattened dictionary written by to_dict. """
+        sensor = SphericalSectorSensor(look_direction=Float3(**data["look_direction"]),
+                                       field_of_view=data["field_of_view"], view_range=data["view_range"])
+        return cls(data["type"], data["id"], Float3(**data["position"]), Float4(**data["rotation"]),
+                   data["random_seed"], data["speed"], sensor)
@@ -0,0 +1,24 @@
+from dataclasses import dataclass, asdict
+from typing import Any
+
+
+@dataclass
+class Weapon:
+    """ Marks an agent (by id) as a weapon platform in a weapon-target assignment scenario. """
+    agent: int
+    effectiveness: int
+
+    def to_dict(self) -> dict[str, Any]:
+        """ Returns a dictionary representation of the weapon. """
+        return asdict(self)
+
+
+@dataclass
+class Target:
+    """ Marks an agent (by id) as a target in a weapon-target assignment scenario. """
+    agent: int
+    value: int
+
+    def to_dict(self) -> dict[str, Any]:
+        """ Returns a dictionary representation of the target. """
+        return asdict(self)
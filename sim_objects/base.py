@@ -2,14 +2,19 @@ from dataclasses import dataclass, asdict
 from geometry.float3 import Float3
 from geometry.float4 import Float4
 import json
+from utils.compression import Codec, DEFAULT_CHUNK_SIZE, find_scenario, read_scenario, remove_variants, write_chunked
 from abc import ABC, abstractmethod
 from typing import Any
 
 
 @dataclass
 class SimObject(ABC):
-    """ Abstract base class for simulation objects. """
+    """
+    Abstract base class for simulation objects. The id is the object's index in generation order within its list; it
+    is kept when a scenario is written in another order (see utils.ordering), so results can always refer to it.
+    """
     type: str
+    id: int
     position: Float3
     rotation: Float4
     random_seed: int
@@ -19,16 +24,43 @@ class SimObject(ABC):
         """ Returns a dictionary representation of the object. """
         pass
 
+    @classmethod
+    @abstractmethod
+    def from_dict(cls, data: dict[str, Any]) -> 'SimObject':
+        """ Builds an object from the dictionary representation written by to_dict. """
+        pass
+
     @staticmethod
-    def write_objects(filename: str, **entity_lists) -> None:
+    def write_objects(filename: str, codec: Codec = Codec.NONE, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      **entity_lists) -> str:
         """
         Writes objects to a json file. Note that this method is a static method which writes a *list*
         of objects. It does not write self. We do this so that we can exploit the nested capabilities of json.dumps,
         since ultimately we'll be writing a list of objects, not a single instance. Strictly, this could and should
         probably be in its own class.
+
+        With a codec, the file is written compressed in chunks of chunk_size entities instead, to filename plus the
+        codec's suffix (see utils.compression). Other stored variants of the scenario are removed, so a stale copy is
+        never read. Returns the path written.
         """
         json_dict = dict()
         for name, entity_list in entity_lists.items():
             json_dict[name] = [entity.to_dict() for entity in entity_list]
+        remove_variants(filename)
+        if codec != Codec.NONE:
+            return write_chunked(filename, codec, json_dict, chunk_size)
         with open(filename, 'w') as file:
-            json.dump(json_dict, file, indent=4)
\ No newline at end of file
+            json.dump(json_dict, file, indent=4)
+        return filename
+
+    @staticmethod
+    def read_objects(filename: str, **entity_types: type['SimObject']) -> dict[str, list['SimObject']]:
+        """
+        Reads objects from a json file written by write_objects. Each keyword names a list in the file and the class
+        to build its entries with, e.g. read_objects(path, agents=Agent, occluders=Occluder). Lists missing from the
+        file come back empty. When only a compressed variant of filename exists, it is read instead; its chunks are
+        decompressed and parsed in parallel.
+        """
+        json_dict = read_scenario(find_scenario(filename) or filename)
+        return {name: [object_type.from_dict(data) for data in json_dict.get(name, [])]
+                for name, object_type in entity_types.items()}
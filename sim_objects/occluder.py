@@ -14,14 +14,22 @@ class Occluder(SimObject):
     shape: str
 
     @classmethod
-    def random(cls, distribution: SpatialDistribution, scale: float, shape: str) -> 'Occluder':
-        """ Generate a random occluder from the given distribution. """
-        position = distribution.get_float3()
-        orientation = Float3.point_on_unit_sphere()
-        rotation = Float4.from_axis(orientation)
-        random_seed = random.randint(0, 1000000000)
-        return cls("occluder", position, rotation, random_seed, scale, shape)
+    def random(cls, distribution: SpatialDistribution, scale: float, shape: str,
+               rng: random.Random | None = None, entity_id: int = 0) -> 'Occluder':
+        """ Generate a random occluder from the given distribution, drawing from rng when one is given. """
+        rng = rng if rng is not None else random
+        position = distribution.get_float3(rng)
+        orientation = Float3.point_on_unit_sphere(rng)
+        rotation = Float4.from_axis(orientation, rng)
+        random_seed = rng.randint(0, 1000000000)
+        return cls("occluder", entity_id, position, rotation, random_seed, scale, shape)
 
     def to_dict(self) -> dict[str, Any]:
         """ Returns a dict representation of the object. """
-        return asdict(self)
\ No newline at end of file
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> 'Occluder':
+        """ Builds an occluder from the dictionary written by to_dict. """
+        return cls(data["type"], data["id"], Float3(**data["position"]), Float4(**data["rotation"]),
+                   data["random_seed"], data["scale"], data["shape"])
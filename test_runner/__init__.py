@@ -1,4 +1,15 @@
 from .harness import BenchmarkHarness
 from .benchmark_result import BenchmarkResult
 
-__all__ = ["BenchmarkHarness", "BenchmarkResult"]
\ No newline at end of file
+__all__ = ["BenchmarkHarness", "BenchmarkResult", "TestRunnerUI", "HeadlessTestRunnerUI"]
+
+
+def __getattr__(name: str):
+    """ Defers the UI imports (and with them rich) until a UI is actually requested. """
+    if name == "TestRunnerUI":
+        from .ui import TestRunnerUI
+        return TestRunnerUI
+    if name == "HeadlessTestRunnerUI":
+        from .headless import HeadlessTestRunnerUI
+        return HeadlessTestRunnerUI
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,24 +1,37 @@
+import argparse
 import time
-from test_runner.ui import TestRunnerUI
 from test_runner.harness import BenchmarkHarness
+from utils.progress import ProgressReporter
 
-def main() -> None:
+def main(no_ui: bool = False) -> None:
     """
     Generates the appropriate benchmarks by parsing the config.yaml and then runs them one by one. Provides visual feedback to
-    user through the TestRunnerUI object.
+    user through the TestRunnerUI object, or through plain log lines when no_ui is set.
     """
+    if no_ui:
+        from test_runner.headless import HeadlessTestRunnerUI as TestRunnerUI
+    else:
+        from test_runner.ui import TestRunnerUI
+
     harness = BenchmarkHarness("config.yaml", "logs.txt")
     harness.write_log_heading()
 
     with TestRunnerUI(harness.benchmark_results) as ui:
         for benchmark_arg in harness.benchmark_list:
             scenario_name = benchmark_arg["-scenarioName"]
-            ui.execute_benchmark(scenario_name)
             harness.write_benchmark_heading(scenario_name)
-            harness.run_benchmark(benchmark_arg)
-            ui.complete_benchmark(scenario_name)
+            harness.run_benchmark(benchmark_arg, ProgressReporter(scenario_name, ui.handle))
         ui.finish()
-        time.sleep(1)
+        if not no_ui:
+            time.sleep(1)
+
+
+def parse_args() -> argparse.Namespace:
+    """ Parses the command line arguments of the test runner. """
+    parser = argparse.ArgumentParser(prog="python -m test_runner", description="Runs the configured benchmarks.")
+    parser.add_argument("--no-ui", action="store_true", help="Print plain result lines instead of the rich UI.")
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(no_ui=parse_args().no_ui)
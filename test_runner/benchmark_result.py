@@ -1,11 +1,22 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 @dataclass
 class BenchmarkResult:
-    """ Simply defines a benchmark result object. """
+    """
+    Simply defines a benchmark result object. When the harness calibrates a run, num_iterations holds the chosen
+    number of updates and configured_iterations the count from config.yaml, so FPS stays comparable across engines.
+    When a reported pair digest does not match the reference, mismatched_sensors lists the [start, stop) sensor id
+    ranges whose block digests differ, and mismatched_sensor_ids the individual sensors within them whose per-sensor
+    digests differ (empty when the engine printed none). attempts counts the runs made, including retries after crashes.
+    """
     result: int
     num_iterations: int
     start_time: float
     time_elapsed: float
     status: str
-    correct: str
\ No newline at end of file
+    correct: str
+    configured_iterations: int = -1
+    calibrated: bool = False
+    attempts: int = 0
+    mismatched_sensors: list[tuple[int, int]] = field(default_factory=list)
+    mismatched_sensor_ids: list[int] = field(default_factory=list)
@@ -1,13 +1,21 @@
-import subprocess
 import time
+import math
 import os
-import yaml
-from typing import Any
+from typing import Any, TextIO
+from test_runner import scheduler
 from test_runner.benchmark_result import BenchmarkResult
+from test_runner.scheduler import ProcessOutcome, ResourceLimits, RunStatus
+from utils.compression import default_scratch_dir, expand_scenario, find_scenario
+from utils.digest import DIGEST_BLOCK_SIZE, PairDigest, format_ranges
+from utils.expected import read_expected, write_expected
+from utils.progress import ProgressReporter
 
 type BenchmarkArgs = dict[str, Any]
 type ScenarioName = str
 
+# --- Seconds the harness waits for the reference daemon before giving up on a reference ---
+DEFAULT_REFERENCE_TIMEOUT = 600.0
+
 class BenchmarkHarness:
     """
     Orchestrates the execution of external benchmark processes.
@@ -26,13 +34,19 @@ class BenchmarkHarness:
 
     def _initialize_benchmarks(self) -> None:
         """ Parses the yaml config file and writes the benchmark jobs to a list. """
-        yaml_dict = yaml.safe_load(open(self.config_path))
+        import yaml  # Deferred so that importing the package stays cheap
+        with open(self.config_path) as config_file:
+            yaml_dict = yaml.safe_load(config_file)
         benchmark_args = []
         for config_name, config_params in yaml_dict.items():
             if config_name == "defaults": continue
             if not config_params["run"]: continue
+            category = config_params.get("category", "geometry")
             for distribution in config_params["distributions"]:
-                directory = os.path.join(os.getcwd(), "benchmarks", "geometry", f"{distribution}_{config_name}")
+                if category == "geometry":
+                    directory = os.path.join(os.getcwd(), "benchmarks", "geometry", f"{distribution}_{config_name}")
+                else:
+                    directory = os.path.join(os.getcwd(), "benchmarks", category, config_name)
                 for size, num_updates in config_params["sizes"].items():
                     clargs = dict()
                     file_name = f"{distribution}_{config_name}_{size}.json"
@@ -41,6 +55,12 @@ class BenchmarkHarness:
                     clargs["-scenarioPath"] = file_path
                     clargs["-scenarioName"] = file_name
                     clargs["-numUpdates"] = str(num_updates)
+                    clargs["calibration"] = config_params.get("calibration")
+                    clargs["reference"] = config_params.get("reference")
+                    clargs["reference_timeout"] = float(config_params.get("reference_timeout",
+                                                                          DEFAULT_REFERENCE_TIMEOUT))
+                    clargs["scratch_dir"] = config_params.get("scratch_dir")
+                    clargs["limits"] = ResourceLimits.from_config(config_params.get("limits"), size)
                     clargs = clargs | config_params["clargs"]
                     benchmark_args.append(clargs)
         self.benchmark_list = benchmark_args
@@ -56,61 +76,388 @@ class BenchmarkHarness:
                                 time_elapsed=-1,
                                 status="Not Started",
                                 num_iterations=int(benchmark["-numUpdates"]),
+                                configured_iterations=int(benchmark["-numUpdates"]),
                                 correct="N/A"))
 
 
-    def run_benchmark(self, clargs: BenchmarkArgs) -> None:
+    def run_benchmark(self, clargs: BenchmarkArgs, reporter: ProgressReporter | None = None) -> None:
         """
         This method does a few things. Most importantly, it forks and executes the benchmark run with the provided BenchmarkArgs.
         When it forks the process with the subprocess module, it sets up a pipe to intercept standard output from the child process.
         It blocks on that pipe, and waits for appropriate flags in order to start and stop a timer, and parse the actual result.
 
+        If calibration is enabled for the scenario, a few short probe runs are executed first to pick the number of updates
+        (see calibrate). The chosen count replaces -numUpdates for the measured run and is recorded in the benchmark result.
+
         Finally, it takes the measured wall clock time and writes it (along with some other data) to the benchmark_results dictionary.
         This looks a bit indirect (why not just return a dictionary entry). But it ends up being much easier to modify the dictionary
         in place to support the visual feedback in the terminal UI by doing it this way.
+
+        A scenario stored only in compressed form (see utils.compression) is decompressed into the group's scratch_dir
+        (default /dev/shm) before the first run and removed afterwards. Verification uses the original path.
+
+        Each run is bounded by the group's limits (see test_runner.scheduler.ResourceLimits). A run that times out, runs
+        out of memory or crashes is not timed or verified; its status records why, and crashed runs are retried first.
+        When the harness itself fails to prepare or verify a run (it cannot expand the scenario or store a reference),
+        the scenario is marked Failed, the error is logged and the suite moves on.
+
+        Groups with a 'reference' setting (no_los or los) get their pair digest reference from the reference daemon after
+        the run when the generator did not write one (see write_reference). Without a daemon answer within the group's
+        reference_timeout, the result stays unverified (N/A).
+
+        Progress is reported through the optional reporter. No events are emitted while the measured run is in flight, so
+        a UI listening to them never competes with the benchmark for CPU.
         """
         scenario_name = clargs["-scenarioName"]
-        clargs_list = list()
-        clargs_list.append(clargs["executable"])
+        benchmark_result = self.benchmark_results[scenario_name]
+        reporter = reporter or ProgressReporter(scenario_name)
+        reporter.start()
+
+        scenario_path = clargs["-scenarioPath"]
+        expanded_path = None
+        try:
+            # --- Engines read plain JSON, so a compressed scenario is expanded into scratch space (a tmpfs by default) ---
+            expanded_path = self.expand_scenario(scenario_path, clargs.get("scratch_dir"))
+            if expanded_path is not None:
+                clargs = clargs | {"-scenarioPath": expanded_path}
+
+            # --- Optionally calibrate the number of updates before the measured run ---
+            calibration = clargs.get("calibration")
+            if calibration and calibration["enabled"]:
+                reporter.message("calibrating")
+                num_updates, status = self.calibrate(clargs)
+                if status != RunStatus.FINISHED:
+                    # --- The measured run would fail the same way, so it is not attempted ---
+                    benchmark_result.status = status
+                    reporter.fail(status)
+                    return
+                if num_updates is not None:
+                    clargs = clargs | {"-numUpdates": str(num_updates)}
+                    benchmark_result.calibrated = True
+            benchmark_result.num_iterations = int(clargs["-numUpdates"])
+            reporter.message("executing")
+
+            benchmark_result.start_time = time.perf_counter()
+            block_size = self.digest_block_size(scenario_path)
+            with open(self.log_path, "a") as log:
+                time_elapsed, result, digest, status, benchmark_result.attempts = self._execute_with_retries(
+                    clargs, log, block_size)
+                benchmark_result.result = result
+                if status != RunStatus.FINISHED:
+                    benchmark_result.status = status
+                    reporter.fail(status)
+                    return
+                benchmark_result.time_elapsed = time_elapsed
+                if digest is not None and clargs.get("reference") and self.needs_reference(scenario_path):
+                    reporter.message("computing reference")
+                    if not self.write_reference(scenario_path, clargs["reference"] == "los",
+                                                clargs.get("reference_timeout"), log):
+                        # --- Without a current reference the result is left unverified (N/A) ---
+                        reporter.finish()
+                        return
+                benchmark_result.correct = self.verify_result(scenario_path, result, digest)
+                if benchmark_result.correct == "false" and digest is not None:
+                    reporter.message("locating mismatches")
+                    self.report_mismatches(clargs, scenario_path, digest, benchmark_result, log)
+        except (OSError, EOFError, RuntimeError) as error:
+            # --- Failures of the harness itself (e.g. a full scratch_dir) fail this scenario, not the whole suite ---
+            with open(self.log_path, "a") as log:
+                log.write(f"### HARNESS ERROR: {scenario_name}: {error}\n")
+            benchmark_result.status = RunStatus.FAILED
+            reporter.fail(RunStatus.FAILED)
+            return
+        finally:
+            if expanded_path is not None:
+                os.remove(expanded_path)
+        reporter.finish()
+
+
+    @staticmethod
+    def verify_result(scenario_path: str, result: int | None, digest: PairDigest | None = None) -> str:
+        """
+        Compares the query result and the pair digest with the reference the generator stored next to the scenario.
+        Returns "true" if everything that could be compared matches, "false" if anything differs, or "N/A" when there is
+        nothing to compare (no reference, or the engine did not report what the reference holds).
+        """
+        expected = read_expected(scenario_path)
+        if expected is None:
+            return "N/A"
+        checks = []
+        if "result" in expected:
+            checks.append(result == expected["result"])
+        if "digest" in expected and digest is not None:
+            checks.append(digest.digest == PairDigest.from_dict(expected).digest)
+        if not checks:
+            return "N/A"
+        return "true" if all(checks) else "false"
+
+
+    @staticmethod
+    def expand_scenario(scenario_path: str, scratch_dir: str | None = None) -> str | None:
+        """
+        Decompresses the scenario into scratch_dir if only a compressed variant of it exists, and returns the path of
+        the plain copy, which has a unique name so concurrent runners can share scratch_dir. Returns None when the plain file exists (or no variant does, which the engine will report).
+        """
+        if os.path.exists(scenario_path):
+            return None
+        source = find_scenario(scenario_path)
+        if source is None:
+            return None
+        return expand_scenario(source, scratch_dir or default_scratch_dir())
+
+
+    @staticmethod
+    def needs_reference(scenario_path: str) -> bool:
+        """
+        Checks whether a scenario lacks a reference digest. A digest computed by the harness is tied to the modification
+        time of the scenario, so it is recomputed once the scenario is regenerated.
+        """
+        expected = read_expected(scenario_path)
+        if expected is None or "digest" not in expected:
+            return True
+        return ("scenario_mtime" in expected and
+                expected["scenario_mtime"] != os.path.getmtime(find_scenario(scenario_path) or scenario_path))
+
+
+    @staticmethod
+    def write_reference(scenario_path: str, los: bool, timeout: float | None, log: TextIO) -> bool:
+        """
+        Asks the reference daemon (python -m python_benchmarks.daemon serve) for the reference digest of a sensing
+        scenario and adds it to the sidecar. Returns False, after logging why, when no daemon is running, the daemon
+        did not answer within timeout seconds or it failed. The harness never computes a full reference itself: at xl
+        with line of sight that is an unbounded job in pure Python, which would hold up the whole suite.
+        """
+        from python_benchmarks.daemon import reference_digest  # Deferred: pulls in the reference kernels
+        try:
+            digest = reference_digest(scenario_path, los, timeout=timeout, in_process=False)
+        except TimeoutError:
+            log.write(f"### REFERENCE SKIPPED: the reference daemon did not answer within {timeout} s\n")
+            return False
+        except RuntimeError as error:
+            log.write(f"### REFERENCE SKIPPED: {error}\n")
+            return False
+        if digest is None:
+            log.write("### REFERENCE SKIPPED: no reference daemon is running\n")
+            return False
+        expected = ((read_expected(scenario_path) or dict()) | digest.to_dict()
+                    | {"scenario_mtime": os.path.getmtime(find_scenario(scenario_path) or scenario_path)})
+        write_expected(scenario_path, **expected)
+        return True
+
+
+    @staticmethod
+    def digest_block_size(scenario_path: str) -> int:
+        """ Returns the block size of the reference digest, so engine blocks are grouped the same way. """
+        expected = read_expected(scenario_path)
+        return int(expected.get("digest_block_size", DIGEST_BLOCK_SIZE)) if expected else DIGEST_BLOCK_SIZE
+
+
+    @staticmethod
+    def locate_mismatches(scenario_path: str, digest: PairDigest) -> list[tuple[int, int]]:
+        """
+        Returns the sensor id ranges whose block digests differ from the reference. Empty if the reference has no
+        digest, the digests match, or the engine only reported the total digest (no blocks to compare). Ranges are as
+        fine as the reference's block size; the output protocol carries no individual pairs to narrow them further.
+        A reference written with another block size than the run's digest gives no ranges either.
+        """
+        expected = read_expected(scenario_path)
+        if expected is None or "digest" not in expected or not digest.blocks:
+            return []
+        reference = PairDigest.from_dict(expected)
+        if reference.block_size != digest.block_size:
+            return []
+        return reference.mismatched_ranges(digest)
+
+
+    def report_mismatches(self, clargs: BenchmarkArgs, scenario_path: str, digest: PairDigest,
+                          benchmark_result: BenchmarkResult, log: TextIO) -> None:
+        """
+        Narrows a digest mismatch down in two steps. The block digests give the mismatching sensor ranges
+        (locate_mismatches). Within those ranges, the engine's per-sensor digests are compared with reference digests
+        computed for just those sensors, which names the individual sensors that differ.
+
+        An engine that printed no per-sensor digests is run once more with -digestSensors set to the ranges, and
+        -numUpdates 1, because only static scenarios have a digest reference. If it still prints none, only the ranges
+        are reported.
+
+        The reference side uses the daemon when one is running. Without it, the digests are only computed in this process
+        without line of sight, because building the occluder grid of a large scenario takes too long.
+        """
+        ranges = self.locate_mismatches(scenario_path, digest)
+        benchmark_result.mismatched_sensors = ranges
+        for start, stop in ranges:
+            log.write(f"### DIGEST MISMATCH: sensors {start}-{stop - 1}\n")
+        if not ranges:
+            return
+
+        reported: PairDigest | None = digest
+        if not digest.sensors:
+            log.write(f"### DIGEST DRILL-DOWN: sensors {format_ranges(ranges)}\n")
+            drill_down = clargs | {"-numUpdates": "1", "-digestSensors": format_ranges(ranges)}
+            _, _, reported, status, _ = self._execute_with_retries(drill_down, log, digest.block_size)
+            if status != RunStatus.FINISHED or reported is None or not reported.sensors:
+                log.write("### DIGEST DRILL-DOWN: the engine printed no per-sensor digests\n")
+                return
+
+        from python_benchmarks.daemon import reference_sensor_digests  # Deferred: pulls in the reference kernels
+        los = clargs.get("reference") == "los"
+        try:
+            reference = reference_sensor_digests(scenario_path, los, ranges, timeout=clargs.get("reference_timeout"),
+                                                 in_process=not los)
+        except (TimeoutError, RuntimeError) as error:
+            log.write(f"### DIGEST DRILL-DOWN: no reference ({error or 'timed out'})\n")
+            return
+        if reference is None:
+            log.write("### DIGEST DRILL-DOWN: line of sight references need a running reference daemon\n")
+            return
+        reported.sensors = {sensor_id: value for sensor_id, value in reported.sensors.items()
+                            if any(start <= sensor_id < stop for start, stop in ranges)}
+        benchmark_result.mismatched_sensor_ids = reported.mismatched_sensors(reference)
+        for sensor_id in benchmark_result.mismatched_sensor_ids:
+            log.write(f"### DIGEST MISMATCH: sensor {sensor_id}\n")
+
+
+    def calibrate(self, clargs: BenchmarkArgs) -> tuple[int | None, RunStatus]:
+        """
+        Picks the number of updates so that the measured run lasts inside the configured [min_time, max_time] window.
+        The first probe runs min(probe_updates, configured updates). Each following probe scales the update count up until
+        a probe lasts at least probe_time seconds, which keeps start-up noise out of the per-update estimate. The per-update
+        time of the last measured probe (the longest, if max_probes runs out first) is then used to aim for the middle of
+        the window. Probes are retried after crashes like the measured run.
+
+        Returns the number of updates and the status of the probes. If a probe fails for good (e.g. times out), the
+        number is None and the status says why. The number is also None when there is nothing to scale from: no probe
+        was run, or a probe reported no timed section (no START/END markers). The configured count is then kept.
+        """
+        calibration = clargs["calibration"]
+        min_time = float(calibration["min_time"])
+        max_time = float(calibration["max_time"])
+        probe_time = float(calibration["probe_time"])
+        max_probes = int(calibration.get("max_probes", 6))
+        probe_updates = max(1, min(int(calibration["probe_updates"]), int(clargs["-numUpdates"])))
+
+        # --- Grow the probe until it is long enough to be trusted. The next count to try is kept apart from the last
+        # one measured, so running out of probes never pairs a time with the wrong count ---
+        measured_updates = 0
+        measured_time = 0.0
+        with open(self.log_path, "a") as log:
+            for _ in range(max_probes):
+                log.write(f"### CALIBRATION PROBE: {probe_updates} updates\n")
+                time_elapsed, _, _, status, _ = self._execute_with_retries(
+                    clargs | {"-numUpdates": str(probe_updates)}, log)
+                if status != RunStatus.FINISHED:
+                    log.write(f"### CALIBRATION FAILED: probe {status.lower()}\n")
+                    return None, status
+                log.write(f"### CALIBRATION PROBE TIME: {time_elapsed:.6f} s\n")
+                if time_elapsed <= 0:
+                    measured_updates = 0
+                    break
+                measured_updates, measured_time = probe_updates, time_elapsed
+                if time_elapsed >= probe_time:
+                    break
+                growth = min(10.0, 1.5 * probe_time / time_elapsed)
+                probe_updates = max(probe_updates + 1, math.ceil(probe_updates * growth))
+
+            if measured_updates == 0:
+                log.write("### CALIBRATION FAILED: no timed probe, keeping the configured updates\n")
+                return None, RunStatus.FINISHED
+
+            # --- Aim for the middle of the window ---
+            time_per_update = measured_time / measured_updates
+            num_updates = max(1, round((min_time + max_time) / 2.0 / time_per_update))
+            log.write(f"### CALIBRATED UPDATES: {num_updates}\n")
+        return num_updates, RunStatus.FINISHED
+
+
+    def _execute_with_retries(self, clargs: BenchmarkArgs, log: TextIO, block_size: int = DIGEST_BLOCK_SIZE
+                              ) -> tuple[float, int | None, PairDigest | None, RunStatus, int]:
+        """ Runs _execute, retrying crashed runs as the group's limits allow. Also returns the number of attempts. """
+        limits = clargs.get("limits") or ResourceLimits()
+        for attempt in range(1, limits.retries + 2):
+            time_elapsed, result, digest, status = self._execute(clargs, log, block_size)
+            if status != RunStatus.CRASHED or attempt > limits.retries:
+                return time_elapsed, result, digest, status, attempt
+            log.write(f"### RETRY {attempt}/{limits.retries} after crash\n")
+            time.sleep(limits.retry_delay)
+
+
+    def _build_command(self, clargs: BenchmarkArgs) -> list[str]:
+        """ Flattens the benchmark args into an argv list. Keys that are not command-line flags (no leading '-') are skipped. """
+        command = [clargs["executable"]]
         for specifier, arg in clargs.items():
-            if specifier in "executable":
+            if not specifier.startswith("-"):
                 continue
-            clargs_list.append(specifier)
+            command.append(specifier)
             if arg:
-                clargs_list.append(arg)
+                command.append(str(arg))
+        return command
 
-        process = subprocess.Popen(clargs_list, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
-                                   encoding="utf-8")
-        self.benchmark_results[scenario_name].start_time = time.perf_counter()
 
+    def _execute(self, clargs: BenchmarkArgs, log: TextIO,
+                 block_size: int = DIGEST_BLOCK_SIZE) -> tuple[float, int | None, PairDigest | None, RunStatus]:
+        """
+        Runs the executable once under the group's resource limits (see test_runner.scheduler), streams its stdout
+        into the log and returns the timed duration, the query result, the pair digest (None if the engine did not
+        print one) and how the run ended. Digest blocks printed by the engine are summed into blocks of block_size
+        sensors, which must be a multiple of the engine's block size (1024 per the output protocol).
+        """
         start_time = 0.0
         end_time = 0.0
         result = None
+        digest = None
+        digest_parts = PairDigest(block_size)
 
-        with open(self.log_path, "a") as log:
-            for line in process.stdout:
-                if "### START BENCHMARK ###" in line:
-                    start_time = time.perf_counter()
-                elif "### END BENCHMARK ###" in line:
-                    end_time = time.perf_counter()
-                elif "### QUERY RESULT" in line:
-                    try:
-                        result = int(line.split("|")[1])
-                    except (IndexError, ValueError):
-                        pass
-                log.write(line)
-                log.flush()
-
-        stderr_output = process.stderr.read()
+        def parse_line(line: str) -> None:
+            """ Handles one stdout line as soon as it arrives, so the timer flags are timestamped without delay. """
+            nonlocal start_time, end_time, result, digest
+            if "### START BENCHMARK ###" in line:
+                start_time = time.perf_counter()
+            elif "### END BENCHMARK ###" in line:
+                end_time = time.perf_counter()
+            elif "### QUERY RESULT" in line:
+                try:
+                    result = int(line.split("|")[1])
+                except (IndexError, ValueError):
+                    pass
+            elif "### QUERY DIGEST BLOCK" in line:
+                try:
+                    fields = line.split("|")
+                    digest_parts.add_block(int(fields[1]), int(fields[2], 16))
+                except (IndexError, ValueError):
+                    pass
+            elif "### QUERY DIGEST SENSOR" in line:
+                try:
+                    fields = line.split("|")
+                    digest_parts.add_sensor(int(fields[1]), int(fields[2], 16))
+                except (IndexError, ValueError):
+                    pass
+            elif "### QUERY DIGEST" in line:
+                try:
+                    digest = int(line.split("|")[1], 16)
+                except (IndexError, ValueError):
+                    pass
+            log.write(line)
+            log.flush()
+
+        limits = clargs.get("limits") or ResourceLimits()
+        try:
+            outcome = scheduler.execute(self._build_command(clargs), limits, parse_line)
+        except OSError as error:
+            outcome = ProcessOutcome(None, False, False, f"Could not start {clargs['executable']}: {error}")
+
+        stderr_output = outcome.stderr
         if stderr_output:
             print("\n--- ERRORS ---")
             print(stderr_output)
             print("--------------")
 
-        process.terminate()
-        self.benchmark_results[scenario_name].time_elapsed = end_time - start_time
-        self.benchmark_results[scenario_name].result = result
-        self.benchmark_results[scenario_name].correct = "true"
+        status = outcome.status
+        if status != RunStatus.FINISHED:
+            log.write(f"### RUN {status.upper()}: exit code {outcome.returncode}\n")
+        if digest is None:
+            return end_time - start_time, result, None, status
+        return end_time - start_time, result, PairDigest(block_size, result or 0, digest, digest_parts.blocks,
+                                                         digest_parts.sensors), status
 
 
     def write_log_heading(self) -> None:
@@ -0,0 +1,72 @@
+from test_runner.benchmark_result import BenchmarkResult
+from utils.progress import ProgressEvent, ProgressKind
+
+
+class HeadlessTestRunnerUI:
+    """
+    Plain, line-oriented replacement for TestRunnerUI. It has the same interface but never imports rich and prints one
+    line per state change, which keeps CI logs readable and the parent process idle while benchmarks are timed.
+    """
+    num_tests: int
+    num_completed: int
+    benchmark_results: dict[str, BenchmarkResult]
+
+    def __init__(self, benchmark_results: dict[str, BenchmarkResult]) -> None:
+        self.num_tests = len(benchmark_results)
+        self.num_completed = 0
+        self.benchmark_results = benchmark_results
+
+    def __enter__(self) -> 'HeadlessTestRunnerUI':
+        """ Enters the context manager. """
+        self.welcome()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        """ Exits the context manager. """
+        pass
+
+    def welcome(self) -> None:
+        """ Prints the welcome message. """
+        print("ABM Simulation Benchmark Runner", flush=True)
+        print(f"Found {self.num_tests} benchmark scenarios to run.", flush=True)
+
+    def handle(self, event: ProgressEvent) -> None:
+        """ Applies a progress event reported by the harness. """
+        if event.kind == ProgressKind.STARTED:
+            self.execute_benchmark(event.job)
+        elif event.kind == ProgressKind.ADVANCED and event.message == "calibrating":
+            self.benchmark_results[event.job].status = "Calibrating"
+            print(f"[{self.num_completed + 1}/{self.num_tests}] {event.job}: calibrating", flush=True)
+        elif event.kind == ProgressKind.FINISHED:
+            self.complete_benchmark(event.job)
+        elif event.kind == ProgressKind.FAILED:
+            data = self.benchmark_results[event.job]
+            data.status = event.message or "Failed"
+            self.num_completed += 1
+            print(f"[{self.num_completed}/{self.num_tests}] {event.job}: {data.status.upper()} "
+                  f"attempts={data.attempts} result={data.result}", flush=True)
+
+    def execute_benchmark(self, scenario_name: str) -> None:
+        """ Prints that the benchmark is executing. """
+        self.benchmark_results[scenario_name].status = "Executing"
+        print(f"[{self.num_completed + 1}/{self.num_tests}] {scenario_name}: executing", flush=True)
+
+    def complete_benchmark(self, scenario_name: str) -> None:
+        """ Prints the benchmark result. """
+        data = self.benchmark_results[scenario_name]
+        data.status = "Finished"
+        self.num_completed += 1
+        fps = f"{data.num_iterations / data.time_elapsed:.4f}" if data.time_elapsed > 0 else "N/A"
+        print(f"[{self.num_completed}/{self.num_tests}] {scenario_name}: finished "
+              f"time={data.time_elapsed:.4f}s updates={data.num_iterations} fps={fps} "
+              f"result={data.result} assert={data.correct}"
+              + (f" attempts={data.attempts}" if data.attempts > 1 else ""), flush=True)
+        for start, stop in data.mismatched_sensors:
+            print(f"    digest mismatch: sensors {start}-{stop - 1}", flush=True)
+        if data.mismatched_sensor_ids:
+            print(f"    digest mismatch: sensor ids {', '.join(map(str, data.mismatched_sensor_ids[:20]))}"
+                  + (" ..." if len(data.mismatched_sensor_ids) > 20 else ""), flush=True)
+
+    def finish(self) -> None:
+        """ Prints that the full test suite is complete. """
+        print("All benchmarks complete!", flush=True)
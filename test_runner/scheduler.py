@@ -0,0 +1,238 @@
+import math
+import os
+import signal
+import subprocess
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    from asyncio import Future, SubprocessTransport
+
+# --- Markers in stderr of a process that ran out of memory (C++, Python, glibc, Rust) ---
+OOM_MARKERS = ("bad_alloc", "MemoryError", "out of memory", "Cannot allocate memory", "memory allocation of")
+
+# --- Signals that only exist on POSIX ---
+_SIGXCPU = getattr(signal, "SIGXCPU", None)
+_SIGKILL = getattr(signal, "SIGKILL", None)
+
+# --- Longest stdout line buffered from an engine; longer lines are handed on in pieces of this size ---
+MAX_LINE_LENGTH = 1 << 24
+
+
+class RunStatus(StrEnum):
+    """ Final status of a benchmark run, as shown in the results table. """
+    FINISHED = "Finished"
+    TIMEOUT = "Timeout"
+    OOM = "OOM"
+    CRASHED = "Crashed"
+    FAILED = "Failed"
+
+
+@dataclass
+class ResourceLimits:
+    """
+    Limits applied to every run of a benchmark. A run longer than timeout seconds (wall clock) is sent SIGTERM, then
+    SIGKILL after kill_grace seconds. memory_mb and cpu_seconds become RLIMIT_AS and RLIMIT_CPU of the process (POSIX
+    only, ignored elsewhere). Crashed runs are retried up to retries times, retry_delay seconds apart. None means no
+    limit.
+    """
+    timeout: float | None = None
+    kill_grace: float = 5.0
+    memory_mb: int | None = None
+    cpu_seconds: int | None = None
+    retries: int = 0
+    retry_delay: float = 1.0
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any] | None, size: str) -> 'ResourceLimits':
+        """
+        Reads the 'limits' mapping of a config.yaml group. The timeout may be a number of seconds or a mapping from size
+        name to seconds; sizes missing from the mapping get no timeout.
+        """
+        config = config or dict()
+        timeout = config.get("timeout")
+        if isinstance(timeout, dict):
+            timeout = timeout.get(size)
+        return cls(timeout=float(timeout) if timeout is not None else None,
+                   kill_grace=float(config.get("kill_grace", 5.0)),
+                   memory_mb=config.get("memory_mb"),
+                   cpu_seconds=config.get("cpu_seconds"),
+                   retries=int(config.get("retries", 0)),
+                   retry_delay=float(config.get("retry_delay", 1.0)))
+
+
+@dataclass
+class ProcessOutcome:
+    """
+    How a process ended. timed_out is set when it was terminated for exceeding its timeout, lingered when it was
+    terminated because it did not exit after closing stdout (its output was complete, so that still counts as finished).
+    """
+    returncode: int | None
+    timed_out: bool
+    lingered: bool
+    stderr: str
+
+    @property
+    def status(self) -> RunStatus:
+        """
+        Classifies the outcome. Exceeding the wall clock or the CPU limit (SIGXCPU) is a timeout. A process killed by
+        SIGKILL that the scheduler did not kill was most likely taken by the kernel's OOM killer; together with the
+        allocation failures reported on stderr, that counts as OOM. Any other non-zero exit is a crash.
+        """
+        if self.timed_out or (_SIGXCPU is not None and self.returncode == -_SIGXCPU):
+            return RunStatus.TIMEOUT
+        if self.returncode == 0 or self.lingered:
+            return RunStatus.FINISHED
+        if ((_SIGKILL is not None and self.returncode == -_SIGKILL) or
+                any(marker in self.stderr for marker in OOM_MARKERS)):
+            return RunStatus.OOM
+        return RunStatus.CRASHED
+
+
+def _limit_resources(limits: ResourceLimits) -> Callable[[], None] | None:
+    """ Returns the preexec_fn that applies the rlimits in the child, or None when there is nothing to apply. """
+    if os.name != "posix" or (limits.memory_mb is None and limits.cpu_seconds is None):
+        return None
+    import resource  # Deferred: POSIX only
+
+    def apply() -> None:
+        """ Runs in the child between fork and exec. """
+        if limits.memory_mb is not None:
+            memory = int(limits.memory_mb) * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+        if limits.cpu_seconds is not None:
+            # --- SIGXCPU at the soft limit, SIGKILL at the hard limit kill_grace seconds later ---
+            soft = int(limits.cpu_seconds)
+            resource.setrlimit(resource.RLIMIT_CPU, (soft, soft + max(1, math.ceil(limits.kill_grace))))
+
+    return apply
+
+
+class _RunProtocol:
+    """
+    asyncio.SubprocessProtocol of a benchmark run (duck typed, so asyncio is only imported once a run starts). stdout
+    is split into lines and handed to on_line as it arrives, stderr is collected. The event loop resolves exited when
+    the process itself exits and stdout_closed when stdout closes, independently of each other: a helper process
+    started by the engine may hold stdout open long after the engine is gone.
+    """
+
+    def __init__(self, on_line: Callable[[str], None], exited: 'Future[int]', stdout_closed: 'Future[None]') -> None:
+        self.on_line = on_line
+        self.exited = exited
+        self.stdout_closed = stdout_closed
+        self.transport: 'SubprocessTransport | None' = None
+        self._partial = b""
+        self._stderr: list[bytes] = []
+
+    def connection_made(self, transport: 'SubprocessTransport') -> None:
+        """ Keeps the transport, which signals the process and reports its exit code. """
+        self.transport = transport
+
+    def pipe_data_received(self, fd: int, data: bytes) -> None:
+        """ Collects stderr and forwards every complete stdout line. """
+        if fd == 2:
+            self._stderr.append(data)
+            return
+        *lines, self._partial = (self._partial + data).split(b"\n")
+        if len(self._partial) > MAX_LINE_LENGTH:
+            lines.append(self._partial)
+            self._partial = b""
+        for line in lines:
+            self.on_line(line.decode("utf-8", errors="replace") + "\n")
+
+    def pipe_connection_lost(self, fd: int, exc: Exception | None) -> None:
+        """ Forwards an unterminated last stdout line once stdout closes. """
+        if fd == 1:
+            if self._partial:
+                self.on_line(self._partial.decode("utf-8", errors="replace"))
+                self._partial = b""
+            if not self.stdout_closed.done():
+                self.stdout_closed.set_result(None)
+
+    def process_exited(self) -> None:
+        """ Called by the event loop as soon as the process exits, whether or not its pipes are still open. """
+        if not self.exited.done():
+            self.exited.set_result(self.transport.get_returncode())
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        """ All pipes are closed and the process has exited; nothing left to do. """
+
+    def pause_writing(self) -> None:
+        """ The benchmark's stdin is never written to. """
+
+    def resume_writing(self) -> None:
+        """ The benchmark's stdin is never written to. """
+
+    @property
+    def stderr(self) -> str:
+        """ Everything the process wrote to stderr so far. """
+        return b"".join(self._stderr).decode("utf-8", errors="replace")
+
+
+def _signal(transport: 'SubprocessTransport', sig: int) -> None:
+    """ Signals the process group of a benchmark (so helper processes go too), or just the process off POSIX. """
+    try:
+        if os.name == "posix":
+            os.killpg(transport.get_pid(), sig)
+        elif sig == signal.SIGTERM:
+            transport.terminate()
+        else:
+            transport.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+async def _terminate(protocol: _RunProtocol, grace: float) -> None:
+    """ Sends SIGTERM, and SIGKILL if the process is still alive after grace seconds. """
+    import asyncio
+    _signal(protocol.transport, signal.SIGTERM)
+    done, _ = await asyncio.wait({protocol.exited}, timeout=grace)
+    if not done:
+        _signal(protocol.transport, _SIGKILL if _SIGKILL is not None else signal.SIGTERM)
+        await protocol.exited
+
+
+async def run_process(command: list[str], limits: ResourceLimits, on_line: Callable[[str], None]) -> ProcessOutcome:
+    """
+    Runs a benchmark executable and hands every stdout line to on_line as soon as it arrives. stderr is collected at
+    the same time, so a chatty engine can never block on a full pipe. The run is bounded by limits.timeout.
+
+    The event loop reports the exit of the process and the end of its output separately (see _RunProtocol), and
+    either can come first. A process which exits while a helper it started still holds stdout open gets kill_grace
+    seconds for its output to drain; its process group is then killed and the run is classified by the exit code. A
+    process which closes stdout but does not exit is terminated after kill_grace seconds.
+    """
+    import asyncio
+    loop = asyncio.get_running_loop()
+    exited, stdout_closed = loop.create_future(), loop.create_future()
+    _, protocol = await loop.subprocess_exec(lambda: _RunProtocol(on_line, exited, stdout_closed), *command,
+                                             stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                             preexec_fn=_limit_resources(limits),
+                                             start_new_session=os.name == "posix")
+    try:
+        done, _ = await asyncio.wait({stdout_closed, exited}, timeout=limits.timeout,
+                                     return_when=asyncio.FIRST_COMPLETED)
+        timed_out = not done
+        lingered = False
+        if timed_out:
+            await _terminate(protocol, limits.kill_grace)
+        elif not exited.done():
+            # --- Output is complete; the process gets kill_grace seconds to exit ---
+            done, _ = await asyncio.wait({exited}, timeout=limits.kill_grace)
+            if not done:
+                lingered = True
+                await _terminate(protocol, limits.kill_grace)
+
+        # --- Let the rest of the output drain, then kill whatever is left of the process group (helpers included) ---
+        await asyncio.wait({stdout_closed}, timeout=limits.kill_grace)
+        _signal(protocol.transport, _SIGKILL if _SIGKILL is not None else signal.SIGTERM)
+        return ProcessOutcome(exited.result(), timed_out, lingered, protocol.stderr)
+    finally:
+        protocol.transport.close()
+
+
+def execute(command: list[str], limits: ResourceLimits, on_line: Callable[[str], None]) -> ProcessOutcome:
+    """ Runs run_process on a fresh event loop and returns its outcome. """
+    import asyncio  # Deferred: asyncio costs more to import than the rest of the harness
+    return asyncio.run(run_process(command, limits, on_line))
@@ -5,11 +5,13 @@ from rich.table import Table
 from rich.live import Live
 from rich.panel import Panel
 from rich.text import Text
+from utils.progress import ProgressEvent, ProgressKind
 
 class TestRunnerUI:
     """
     Represents the UI for the rest runner module. Provides rich visual feedback to the user about benchmarking
-    progress and results process.
+    progress and results process. The display is only redrawn when the harness reports a progress event, and the
+    results table is built lazily at draw time (see __rich__), so nothing runs while a benchmark is being timed.
     """
     welcome_message = Text("Welcome to the ABM Simulation Benchmark Runner", justify="center", style="bold green")
     welcome_panel = Panel(welcome_message, title="[bold cyan]Benchmark Runner[/bold cyan]", border_style="cyan")
@@ -34,9 +36,9 @@ class TestRunnerUI:
         self.console = Console()
         self.progress = Progress(*self.progress_cols, console=self.console)
         self.task_id = self.progress.add_task("Running benchmarks...", total=self.num_tests)
-        self.table = self._generate_results_table()
-        self.display_group = Group(self.progress, self.table)
-        self.live = Live(self.display_group, console=self.console, screen=False, redirect_stderr=False, vertical_overflow="visible")
+        self.display_group = Group(self.progress, self)
+        self.live = Live(self.display_group, console=self.console, screen=False, auto_refresh=False,
+                         redirect_stderr=False, vertical_overflow="visible")
 
     def __enter__(self) -> 'TestRunnerUI':
         """ Enters the context manager. """
@@ -53,28 +55,46 @@ class TestRunnerUI:
         self.console.print(self.welcome_panel)
         self.console.print(f"Found [bold yellow]{self.num_tests}[/bold yellow] benchmark scenarios to run.")
 
+    def __rich__(self) -> Table:
+        """ Builds the results table when (and only when) the display is redrawn. """
+        return self._generate_results_table()
+
+    def handle(self, event: ProgressEvent) -> None:
+        """ Applies a progress event reported by the harness. """
+        if event.kind == ProgressKind.STARTED:
+            self.execute_benchmark(event.job)
+        elif event.kind == ProgressKind.ADVANCED and event.message == "calibrating":
+            self.benchmark_results[event.job].status = "Calibrating"
+            self.live.refresh()
+        elif event.kind == ProgressKind.FINISHED:
+            self.complete_benchmark(event.job)
+        elif event.kind == ProgressKind.FAILED:
+            self.benchmark_results[event.job].status = event.message or "Failed"
+            self.progress.update(self.task_id, advance=1)
+            self.live.refresh()
+
     def execute_benchmark(self, scenario_name: str) -> None:
         """ Updates UI to show the benchmark is executing. """
         self.benchmark_results[scenario_name].status = "Executing"
-        self.table = self._generate_results_table()
-        self.live.update(Group(self.progress, self.table))
+        self.live.refresh()
 
     def complete_benchmark(self, scenario_name: str) -> None:
         """ Updates UI to show the benchmark is complete. """
         self.benchmark_results[scenario_name].status = "Finished"
         self.progress.update(self.task_id, advance=1)
-        self.table = self._generate_results_table()
-        self.live.update(Group(self.progress, self.table))
+        self.live.refresh()
 
     def finish(self) -> None:
         """ Updates UI to show full test suite is complete. """
         self.progress.update(self.task_id, description="[bold green]All benchmarks complete!")
+        self.live.refresh()
 
     @staticmethod
     def _get_status_style(status: str) -> str:
         """ Helper function to style status text. """
         if status == "Finished": return "bold green"
-        if status == "Executing": return "bold yellow"
+        if status in ("Executing", "Calibrating"): return "bold yellow"
+        if status in ("Failed", "Timeout", "OOM", "Crashed"): return "bold red"
         return "dim"
 
     @staticmethod
@@ -97,14 +117,15 @@ class TestRunnerUI:
 
         for name, data in self.benchmark_results.items():
             time_str = f"{data.time_elapsed:.4f}" if data.time_elapsed >= 0 else "N/A"
-            time_per_iter =f"{data.num_iterations/data.time_elapsed:.4f}" if data.time_elapsed >= 0 else "N/A"
-            data_str = f"{data.result}" if data.result >= 0 else "N/A"
+            time_per_iter =f"{data.num_iterations/data.time_elapsed:.4f}" if data.time_elapsed > 0 else "N/A"
+            data_str = f"{data.result}" if data.result is not None and data.result >= 0 else "N/A"
             status_style = self._get_status_style(data.status)
+            updates_str = f"{data.num_iterations} [dim](cal)[/]" if data.calibrated else str(data.num_iterations)
             table.add_row(
                 name,
                 f"[{status_style}]{data.status}[/]",
                 time_str,
-                str(data.num_iterations),
+                updates_str,
                 time_per_iter,
                 data_str,
                 self._get_assert_text(data.correct))
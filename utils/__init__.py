@@ -1,4 +1,18 @@
 from .distribution_builder import DistributionBuilder
 from .distributions import SpatialDistribution, UniformSpatialDistribution, GaussianSpatialDistribution
+from .estimation import (SensorMix, as_sensor_mix, ScenarioEstimate, expected_targets, expected_targets_uniform,
+                         expected_targets_gaussian, estimate_scenario, recommend_cell_size)
+from .rng import derive_seed, entity_rng
+from .expected import expected_path, write_expected, read_expected
+from .ordering import SpatialOrder, morton_key, hilbert_key, spatial_sort
+from .digest import DIGEST_BLOCK_SIZE, PairDigest, pair_hash, format_digest, sensor_digests, format_ranges
+from .compression import Codec, compressed_path, find_scenario, read_scenario, expand_scenario
+from .progress import ProgressKind, ProgressEvent, ProgressReporter, watch_processes
 
-__all__ = ["DistributionBuilder", "SpatialDistribution", "UniformSpatialDistribution", "GaussianSpatialDistribution"]
\ No newline at end of file
+__all__ = ["DistributionBuilder", "SpatialDistribution", "UniformSpatialDistribution", "GaussianSpatialDistribution",
+           "SensorMix", "as_sensor_mix", "ScenarioEstimate", "expected_targets", "expected_targets_uniform",
+           "expected_targets_gaussian", "estimate_scenario", "recommend_cell_size", "derive_seed", "entity_rng",
+           "expected_path", "write_expected", "read_expected", "SpatialOrder", "morton_key",
+           "hilbert_key", "spatial_sort", "DIGEST_BLOCK_SIZE", "PairDigest", "pair_hash",
+           "format_digest", "sensor_digests", "format_ranges", "Codec", "compressed_path", "find_scenario", "read_scenario", "expand_scenario",
+           "ProgressKind", "ProgressEvent", "ProgressReporter", "watch_processes"]
\ No newline at end of file
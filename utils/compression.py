@@ -0,0 +1,173 @@
+import bz2
+import gzip
+import json
+import lzma
+import os
+import shutil
+import tempfile
+from enum import StrEnum, auto
+from typing import Any, Callable
+
+# --- Entities per compressed chunk. Each chunk is decompressed and parsed independently ---
+DEFAULT_CHUNK_SIZE = 10000
+
+
+class Codec(StrEnum):
+    """ Compression of a scenario file. All codecs are in the standard library. """
+    NONE = auto()
+    GZIP = auto()
+    LZMA = auto()
+    BZ2 = auto()
+
+
+CODEC_SUFFIXES = {Codec.GZIP: ".gz", Codec.LZMA: ".xz", Codec.BZ2: ".bz2"}
+
+_COMPRESSORS: dict[Codec, Callable[[bytes], bytes]] = {
+    Codec.GZIP: lambda data: gzip.compress(data, mtime=0),
+    Codec.LZMA: lzma.compress,
+    Codec.BZ2: bz2.compress,
+}
+_DECOMPRESSORS: dict[Codec, Callable[[bytes], bytes]] = {
+    Codec.GZIP: gzip.decompress,
+    Codec.LZMA: lzma.decompress,
+    Codec.BZ2: bz2.decompress,
+}
+_OPENERS = {Codec.GZIP: gzip.open, Codec.LZMA: lzma.open, Codec.BZ2: bz2.open}
+
+
+def compressed_path(path: str, codec: Codec) -> str:
+    """ Returns the file name of a scenario written with a codec, e.g. scenario.json.gz. """
+    return path + CODEC_SUFFIXES.get(Codec(codec), "")
+
+
+def index_path(path: str) -> str:
+    """ Returns the path of the chunk index written next to a compressed scenario. """
+    return path + ".index.json"
+
+
+def codec_of(path: str) -> Codec:
+    """ Returns the codec of a scenario file from its suffix. """
+    for codec, suffix in CODEC_SUFFIXES.items():
+        if path.endswith(suffix):
+            return codec
+    return Codec.NONE
+
+
+def find_scenario(path: str) -> str | None:
+    """
+    Returns the file holding a scenario: the plain JSON path if it exists, else the first compressed variant found.
+    Returns None when there is neither.
+    """
+    for candidate in [path] + [compressed_path(path, codec) for codec in CODEC_SUFFIXES]:
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def remove_variants(path: str) -> None:
+    """ Removes every stored variant of a scenario (plain and compressed) and their indexes. """
+    for candidate in [path] + [compressed_path(path, codec) for codec in CODEC_SUFFIXES]:
+        for file_path in (candidate, index_path(candidate)):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+
+def write_chunked(path: str, codec: Codec, entity_lists: dict[str, list[dict[str, Any]]],
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+    """
+    Writes a scenario as a series of independently compressed chunks and returns the path written. Decompressing the
+    whole file as one stream (e.g. with gunzip) gives the plain JSON document, because every supported codec accepts
+    concatenated streams. An index next to the file lists the byte range, list name and entity count of every chunk,
+    so read_chunked can decompress and parse the chunks in parallel.
+
+    Each chunk holds the JSON punctuation that joins it to the previous one (its "glue", e.g. '{"agents":[' or ',')
+    followed by its entities separated by commas. The index records the glue length, so a chunk parses on its own.
+    """
+    codec = Codec(codec)
+    file_path = compressed_path(path, codec)
+    chunks = []
+    offset = 0
+    with open(file_path, "wb") as file:
+
+        def write_chunk(list_name: str | None, glue: str, entities: list[dict[str, Any]]) -> None:
+            """ Compresses and appends one chunk, and records it in the index. """
+            nonlocal offset
+            text = glue + ",".join(json.dumps(entity, separators=(",", ":")) for entity in entities)
+            data = _COMPRESSORS[codec](text.encode("utf-8"))
+            file.write(data)
+            chunks.append({"list": list_name, "offset": offset, "length": len(data), "glue": len(glue.encode("utf-8")),
+                           "count": len(entities)})
+            offset += len(data)
+
+        opening = "{"
+        for list_name, entities in entity_lists.items():
+            for start in range(0, max(len(entities), 1), chunk_size):
+                glue = f"{opening}{json.dumps(list_name)}:[" if start == 0 else ","
+                write_chunk(list_name, glue, entities[start:start + chunk_size])
+            opening = "],"
+        write_chunk(None, "]}" if entity_lists else "{}", [])
+
+    with open(index_path(file_path), "w") as file:
+        json.dump({"codec": str(codec), "chunks": chunks}, file, indent=4)
+    return file_path
+
+
+def _parse_chunk(codec: Codec, data: bytes, glue: int) -> list[dict[str, Any]]:
+    """ Decompresses one chunk and parses its entities. """
+    text = _DECOMPRESSORS[codec](data)[glue:].decode("utf-8")
+    return json.loads("[" + text + "]") if text else []
+
+
+def read_chunked(path: str, num_threads: int | None = None) -> dict[str, list[dict[str, Any]]]:
+    """
+    Reads a scenario written by write_chunked and returns its entity lists as dictionaries. Chunks are decompressed and
+    parsed on a thread pool (the codecs release the GIL while decompressing). Without an index, e.g. for a file
+    compressed by hand, the file is decompressed as one stream instead.
+    """
+    codec = codec_of(path)
+    if not os.path.exists(index_path(path)):
+        with _OPENERS[codec](path, "rt", encoding="utf-8") as file:
+            return json.load(file)
+
+    with open(index_path(path)) as file:
+        chunks = [chunk for chunk in json.load(file)["chunks"] if chunk["list"] is not None]
+    with open(path, "rb") as file:
+        data = file.read()
+    from concurrent.futures import ThreadPoolExecutor  # Deferred: importing it costs more than everything else here
+    with ThreadPoolExecutor(max_workers=num_threads) as pool:
+        parsed = pool.map(lambda chunk: _parse_chunk(codec, data[chunk["offset"]:chunk["offset"] + chunk["length"]],
+                                                     chunk["glue"]), chunks)
+        entity_lists: dict[str, list[dict[str, Any]]] = dict()
+        for chunk, entities in zip(chunks, parsed):
+            entity_lists.setdefault(chunk["list"], []).extend(entities)
+    return entity_lists
+
+
+def read_scenario(path: str, num_threads: int | None = None) -> dict[str, Any]:
+    """ Reads a scenario from a plain JSON file, or from a compressed file with read_chunked. """
+    if codec_of(path) == Codec.NONE:
+        with open(path) as file:
+            return json.load(file)
+    return read_chunked(path, num_threads)
+
+
+def expand_scenario(path: str, directory: str) -> str:
+    """
+    Decompresses a scenario into directory (ideally a tmpfs such as /dev/shm) and returns the path of the plain JSON
+    file, for engines that only read plain JSON. The file gets a unique name (<scenario name>-<random>.json), so
+    runners sharing the directory never overwrite each other's copy. The caller removes it when done.
+    """
+    stem = os.path.basename(path).removesuffix(CODEC_SUFFIXES[codec_of(path)]).removesuffix(".json")
+    handle, target = tempfile.mkstemp(suffix=".json", prefix=f"{stem}-", dir=directory)
+    try:
+        with _OPENERS[codec_of(path)](path, "rb") as source, os.fdopen(handle, "wb") as destination:
+            shutil.copyfileobj(source, destination, 1 << 20)
+    except BaseException:
+        os.remove(target)
+        raise
+    return target
+
+
+def default_scratch_dir() -> str:
+    """ Returns /dev/shm when it exists (memory backed on Linux), else the temporary directory. """
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
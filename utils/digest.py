@@ -0,0 +1,120 @@
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+from utils.rng import _mix_64, _MASK_64
+
+DIGEST_BLOCK_SIZE = 1024
+
+
+def pair_hash(sensor_id: int, target_id: int) -> int:
+    """ Hash of one sensed pair: the SplitMix64 finalizer applied to (sensor_id << 32) | target_id. """
+    return _mix_64(((sensor_id & 0xFFFFFFFF) << 32) | (target_id & 0xFFFFFFFF))
+
+
+def format_digest(value: int) -> str:
+    """ Formats a digest as 16 lowercase hex digits, the form used in the output protocol and the sidecar files. """
+    return f"{value:016x}"
+
+
+@dataclass
+class PairDigest:
+    """
+    Order independent digest of a set of (sensor_id, target_id) pairs. The digest is the sum of pair_hash over all
+    pairs modulo 2^64, so pairs can be added in any order, by any number of threads, and partial digests can simply be
+    added together. Unlike a bare count, dropping one pair and adding another changes it.
+
+    Sensors are also grouped into blocks of block_size consecutive ids, and a digest is kept per block that holds at
+    least one pair. Comparing block digests narrows a mismatch down to a few sensor ranges. Memory is O(agents /
+    block_size), independent of the number of pairs. For the sensors of those ranges, per-sensor digests (see
+    sensor_digests) then name the individual sensors that differ; an engine reports them in sensors.
+    """
+    block_size: int = DIGEST_BLOCK_SIZE
+    count: int = 0
+    digest: int = 0
+    blocks: dict[int, int] = field(default_factory=dict)
+    sensors: dict[int, int] = field(default_factory=dict)
+
+    def add(self, sensor_id: int, target_id: int) -> None:
+        """ Adds one pair. """
+        value = pair_hash(sensor_id, target_id)
+        block = sensor_id // self.block_size
+        self.count += 1
+        self.digest = (self.digest + value) & _MASK_64
+        self.blocks[block] = (self.blocks.get(block, 0) + value) & _MASK_64
+
+    def add_block(self, start: int, value: int) -> None:
+        """
+        Adds the digest of a block of pairs whose sensor ids start at start, e.g. one printed by an engine. Blocks finer
+        than block_size are summed into the block holding start. The total digest and count are not touched.
+        """
+        block = start // self.block_size
+        self.blocks[block] = (self.blocks.get(block, 0) + value) & _MASK_64
+
+    def add_sensor(self, sensor_id: int, value: int) -> None:
+        """ Adds the digest of one sensor's pairs, e.g. one printed by an engine. Nothing else is touched. """
+        self.sensors[sensor_id] = (self.sensors.get(sensor_id, 0) + value) & _MASK_64
+
+    def add_pairs(self, pairs: Iterable[tuple[int, int]]) -> 'PairDigest':
+        """ Adds a stream of pairs and returns self. The stream is consumed lazily. """
+        for sensor_id, target_id in pairs:
+            self.add(sensor_id, target_id)
+        return self
+
+    def block_range(self, block: int) -> tuple[int, int]:
+        """ Returns the [start, stop) sensor ids of a block. """
+        return block * self.block_size, (block + 1) * self.block_size
+
+    def mismatched_ranges(self, other: 'PairDigest') -> list[tuple[int, int]]:
+        """
+        Returns the [start, stop) sensor id ranges whose block digests differ between the two digests. Adjacent
+        blocks are merged. Both digests must use the same block size.
+        """
+        if self.block_size != other.block_size:
+            raise ValueError(f"Block sizes differ: {self.block_size} != {other.block_size}.")
+        ranges: list[tuple[int, int]] = []
+        for block in sorted(self.blocks.keys() | other.blocks.keys()):
+            if self.blocks.get(block, 0) == other.blocks.get(block, 0):
+                continue
+            start, stop = self.block_range(block)
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], stop)
+            else:
+                ranges.append((start, stop))
+        return ranges
+
+    def mismatched_sensors(self, reference: dict[int, int]) -> list[int]:
+        """
+        Returns the ids of the sensors whose digest in sensors differs from the reference per-sensor digests (see
+        sensor_digests), sorted. A sensor missing from either side has the digest 0 (no pairs).
+        """
+        return sorted(sensor_id for sensor_id in self.sensors.keys() | reference.keys()
+                      if self.sensors.get(sensor_id, 0) != reference.get(sensor_id, 0))
+
+    def to_dict(self) -> dict[str, Any]:
+        """ Returns the fields stored in a sidecar file. Block digests are keyed by the first sensor id of the block. """
+        return {
+            "pairs": self.count,
+            "digest": format_digest(self.digest),
+            "digest_block_size": self.block_size,
+            "digest_blocks": {str(block * self.block_size): format_digest(value)
+                              for block, value in sorted(self.blocks.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> 'PairDigest':
+        """ Reads the fields written by to_dict. """
+        block_size = int(data.get("digest_block_size", DIGEST_BLOCK_SIZE))
+        blocks = {int(start) // block_size: int(value, 16) for start, value in data.get("digest_blocks", {}).items()}
+        return cls(block_size, int(data.get("pairs", 0)), int(data["digest"], 16), blocks)
+
+
+def sensor_digests(pairs: Iterable[tuple[int, int]]) -> dict[int, int]:
+    """ Returns the digest of every sensor's pairs, for the sensors that have at least one. """
+    digests: dict[int, int] = dict()
+    for sensor_id, target_id in pairs:
+        digests[sensor_id] = (digests.get(sensor_id, 0) + pair_hash(sensor_id, target_id)) & _MASK_64
+    return digests
+
+
+def format_ranges(ranges: list[tuple[int, int]]) -> str:
+    """ Formats [start, stop) sensor id ranges for the -digestSensors argument, e.g. "2048-3072,8192-9216". """
+    return ",".join(f"{start}-{stop}" for start, stop in ranges)
@@ -1,31 +1,35 @@
 from dataclasses import dataclass
 from utils.distributions import UniformSpatialDistribution, GaussianSpatialDistribution
+from utils.estimation import SensorMix, uniform_side_for_targets, gaussian_sigma_for_targets
 from geometry.float3 import Float3
-import math
 from sim_objects.sensor import Sensor
 
 @dataclass
 class DistributionBuilder:
-    """ Represents a spatial distribution factory. """
+    """
+    Represents a spatial distribution factory. Worlds are sized so that the *expected* number of targets per sensor
+    (see utils.estimation) equals targets_per_sensor, which keeps uniform and normal scenarios comparable. Given a
+    sensor mix, the expectation is averaged over all sensors.
+    """
     num_agents: int
 
-    def build_gauss_from_sensor_and_targets(self, sensor: Sensor, targets_per_sensor: int) -> GaussianSpatialDistribution:
+    def build_gauss_from_sensor_and_targets(self, sensor: Sensor | SensorMix,
+                                            targets_per_sensor: int) -> GaussianSpatialDistribution:
         """ Builds a Gaussian distribution from a sensor and targets. """
         scaling_factor = self._sigma(sensor, targets_per_sensor)
         mu = Float3.zero()
         sigma = Float3.one() * scaling_factor
         return GaussianSpatialDistribution(mu, sigma)
 
-    def build_uniform_from_sensor_and_targets(self, sensor: Sensor, targets_per_sensor: int) -> UniformSpatialDistribution:
+    def build_uniform_from_sensor_and_targets(self, sensor: Sensor | SensorMix,
+                                              targets_per_sensor: int) -> UniformSpatialDistribution:
         """ Builds a Uniform distribution from a sensor and targets. """
-        desired_density = targets_per_sensor / sensor.volume
-        desired_world_volume = self.num_agents / desired_density
-        desired_world_dimensions = desired_world_volume ** (1.0 / 3.0)
+        desired_world_dimensions = uniform_side_for_targets(self.num_agents, sensor, targets_per_sensor)
         coord = desired_world_dimensions / 2
         min_f3 = Float3(-coord, -coord, -coord)
         max_f3 = Float3(coord, coord, coord)
         return UniformSpatialDistribution(min_f3, max_f3)
 
-    def _sigma(self, sensor: Sensor, targets_per_sensor: int) -> float:
-        """ Calculates appropriate sigma from sensor volume and targets. """
-        return (self.num_agents * sensor.volume / targets_per_sensor) ** (1.0 / 3.0) / math.pi
\ No newline at end of file
+    def _sigma(self, sensor: Sensor | SensorMix, targets_per_sensor: int) -> float:
+        """ Calculates the sigma for which the expected targets per sensor match. """
+        return gaussian_sigma_for_targets(self.num_agents, sensor, targets_per_sensor)
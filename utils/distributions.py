@@ -6,7 +6,7 @@ import random
 class SpatialDistribution(ABC):
     """ Abstract class to implement spatial distributions. """
     @abstractmethod
-    def get_float3(self) -> Float3:
+    def get_float3(self, rng: random.Random | None = None) -> Float3:
         pass
 
 
@@ -16,11 +16,12 @@ class UniformSpatialDistribution(SpatialDistribution):
     min_f3: Float3
     max_f3: Float3
 
-    def get_float3(self) -> Float3:
+    def get_float3(self, rng: random.Random | None = None) -> Float3:
         """ Generates the next float3 from the uniform distribution. """
-        x = random.uniform(self.min_f3.x, self.max_f3.x)
-        y = random.uniform(self.min_f3.y, self.max_f3.y)
-        z = random.uniform(self.min_f3.z, self.max_f3.z)
+        rng = rng if rng is not None else random
+        x = rng.uniform(self.min_f3.x, self.max_f3.x)
+        y = rng.uniform(self.min_f3.y, self.max_f3.y)
+        z = rng.uniform(self.min_f3.z, self.max_f3.z)
         return Float3(x, y, z)
 
 
@@ -30,10 +31,11 @@ class GaussianSpatialDistribution(SpatialDistribution):
     mu: Float3
     sigma: Float3
 
-    def get_float3(self) -> Float3:
+    def get_float3(self, rng: random.Random | None = None) -> Float3:
         """ Generates the next float3 from the gaussian distribution. """
-        x = random.gauss(self.mu.x, self.sigma.x)
-        y = random.gauss(self.mu.y, self.sigma.y)
-        z = random.gauss(self.mu.z, self.sigma.z)
+        rng = rng if rng is not None else random
+        x = rng.gauss(self.mu.x, self.sigma.x)
+        y = rng.gauss(self.mu.y, self.sigma.y)
+        z = rng.gauss(self.mu.z, self.sigma.z)
         return Float3(x, y, z)
 
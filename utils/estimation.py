@@ -0,0 +1,226 @@
+from collections import Counter
+from dataclasses import dataclass, field
+import math
+import random
+from geometry.float3 import Float3
+from sim_objects.sensor import SphericalSectorSensor
+from utils.distributions import SpatialDistribution, UniformSpatialDistribution, GaussianSpatialDistribution
+
+
+type SensorMix = list[tuple[float, SphericalSectorSensor]]
+
+
+def as_sensor_mix(sensor: SphericalSectorSensor | SensorMix) -> SensorMix:
+    """ Returns (fraction, sensor) classes with fractions summing to one. A single sensor is a mix of one class. """
+    if isinstance(sensor, SphericalSectorSensor):
+        return [(1.0, sensor)]
+    total = sum(fraction for fraction, _ in sensor)
+    return [(fraction / total, sensor_class) for fraction, sensor_class in sensor]
+
+
+def _cone_fraction(sensor: SphericalSectorSensor) -> float:
+    """ Fraction of the full sphere covered by the sensor's field of view. """
+    return (1 - math.cos(math.radians(sensor.field_of_view / 2.0))) / 2.0
+
+
+def _chi3_cdf(k: float) -> float:
+    """ CDF of the chi distribution with three degrees of freedom (the length of a standard normal 3-vector). """
+    return math.erf(k / math.sqrt(2.0)) - math.sqrt(2.0 / math.pi) * k * math.exp(-k * k / 2.0)
+
+
+def _uniform_ball_integral(r: float, side: float) -> float:
+    """ Side^3 times the integral of the offset density of two uniform points over a ball of radius r <= side. """
+    return (4.0 / 3.0 * math.pi * r ** 3
+            - 1.5 * math.pi * r ** 4 / side
+            + 1.6 * r ** 5 / side ** 2
+            - r ** 6 / (6.0 * side ** 3))
+
+
+def _uniform_in_range_probability(r: float, side: float, steps: int = 128) -> float:
+    """
+    Probability that two independent uniform points in a cube are at most r apart. Uses the closed form for
+    r <= side. Beyond that, the offset along z is integrated analytically (|dz| has density 2 (side - z) / side^2)
+    and x, y with the midpoint rule, which is accurate to about 1e-4.
+    """
+    if r <= side:
+        return _uniform_ball_integral(r, side) / side ** 3
+    if r * r >= 3.0 * side * side:
+        return 1.0
+    step = side / steps
+    total = 0.0
+    for i in range(steps):
+        x = (i + 0.5) * step
+        for j in range(steps):
+            y = (j + 0.5) * step
+            rest = r * r - x * x - y * y
+            if rest <= 0.0:
+                continue
+            z = min(math.sqrt(rest), side)
+            total += (side - x) * (side - y) * (2.0 * z / side - z * z / side ** 2)
+    return total * step * step * 4.0 / side ** 4
+
+
+def expected_targets_uniform(num_agents: int, sensor: SphericalSectorSensor | SensorMix, side: float) -> float:
+    """
+    Expected number of targets per sensor when agents are uniform in a cube with the given side. The offset between
+    two independent uniform points has density prod(side - |r_i|) / side^6, and integrating it over the sensor volume
+    (averaged over look directions) gives a closed form, which is exact as long as view_range <= side (longer ranges
+    are integrated numerically). Boundary effects are included: sensors near a face see fewer targets than
+    density * volume. For a sensor mix, the result is averaged over all sensors.
+    """
+    return (num_agents - 1) * sum(fraction * _cone_fraction(sensor_class)
+                                  * _uniform_in_range_probability(sensor_class.view_range, side)
+                                  for fraction, sensor_class in as_sensor_mix(sensor))
+
+
+def expected_targets_gaussian(num_agents: int, sensor: SphericalSectorSensor | SensorMix, sigma: float) -> float:
+    """
+    Expected number of targets per sensor when agents are drawn from an isotropic gaussian. The offset between two
+    independent agents is gaussian with standard deviation sigma * sqrt(2) per axis, so the probability that a target
+    falls in range is a chi-3 CDF. The result is exact, even when the view range is comparable to sigma. For a sensor
+    mix, the result is averaged over all sensors.
+    """
+    return (num_agents - 1) * sum(fraction * _cone_fraction(sensor_class)
+                                  * _chi3_cdf(sensor_class.view_range / (math.sqrt(2.0) * sigma))
+                                  for fraction, sensor_class in as_sensor_mix(sensor))
+
+
+def _solve_decreasing(function, target: float, low: float, high: float, iterations: int = 100) -> float:
+    """ Bisection for a monotonically decreasing function on [low, high]. """
+    for _ in range(iterations):
+        middle = (low + high) / 2.0
+        if function(middle) > target:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2.0
+
+
+def uniform_side_for_targets(num_agents: int, sensor: SphericalSectorSensor | SensorMix,
+                             targets_per_sensor: float) -> float:
+    """ Side of the uniform world for which expected_targets_uniform equals targets_per_sensor. """
+    mix = as_sensor_mix(sensor)
+    cone_fraction = sum(fraction * _cone_fraction(sensor_class) for fraction, sensor_class in mix)
+    if (num_agents - 1) * cone_fraction <= targets_per_sensor:
+        raise ValueError(f"{num_agents} agents cannot reach {targets_per_sensor} targets per sensor.")
+    mean_volume = sum(fraction * sensor_class.volume for fraction, sensor_class in mix)
+    high = ((num_agents - 1) * mean_volume / targets_per_sensor) ** (1.0 / 3.0) * 2.0
+    while expected_targets_uniform(num_agents, mix, high) > targets_per_sensor:
+        high *= 2.0
+    return _solve_decreasing(lambda side: expected_targets_uniform(num_agents, mix, side), targets_per_sensor,
+                             0.0, high)
+
+
+def gaussian_sigma_for_targets(num_agents: int, sensor: SphericalSectorSensor | SensorMix,
+                               targets_per_sensor: float) -> float:
+    """ Standard deviation of the gaussian world for which expected_targets_gaussian equals targets_per_sensor. """
+    mix = as_sensor_mix(sensor)
+    cone_fraction = sum(fraction * _cone_fraction(sensor_class) for fraction, sensor_class in mix)
+    if (num_agents - 1) * cone_fraction <= targets_per_sensor:
+        raise ValueError(f"{num_agents} agents cannot reach {targets_per_sensor} targets per sensor.")
+    high = max(sensor_class.view_range for _, sensor_class in mix)
+    while expected_targets_gaussian(num_agents, mix, high) > targets_per_sensor:
+        high *= 2.0
+    return _solve_decreasing(lambda sigma: expected_targets_gaussian(num_agents, mix, sigma), targets_per_sensor,
+                             0.0, high)
+
+
+def expected_targets(distribution: SpatialDistribution, num_agents: int,
+                     sensor: SphericalSectorSensor | SensorMix) -> float:
+    """ Analytic expected targets per sensor for a cubic uniform or isotropic gaussian distribution. """
+    if isinstance(distribution, UniformSpatialDistribution):
+        return expected_targets_uniform(num_agents, sensor, distribution.max_f3.x - distribution.min_f3.x)
+    if isinstance(distribution, GaussianSpatialDistribution):
+        return expected_targets_gaussian(num_agents, sensor, distribution.sigma.x)
+    raise NotImplementedError
+
+
+@dataclass
+class ScenarioEstimate:
+    """
+    Predicted properties of a generated scenario. Targets are per sensor. The occupancy histogram maps the number of
+    agents in a grid cell to the number of occupied cells with that count. Candidates and cells are per query when
+    the agents are binned into a uniform grid with the given cell size and every cell within view range is visited.
+    """
+    analytic_targets: float
+    sampled_targets: float
+    sampled_targets_std: float
+    cell_size: float
+    occupied_cells: int
+    occupancy_histogram: dict[int, int] = field(default_factory=dict)
+    mean_candidates_per_query: float = 0.0
+    mean_cells_per_query: float = 0.0
+
+
+def estimate_scenario(distribution: SpatialDistribution, num_agents: int, sensor: SphericalSectorSensor | SensorMix,
+                      cell_size: float | None = None, num_queries: int = 1000, random_seed: int = 0) -> ScenarioEstimate:
+    """
+    Monte-Carlo estimate of a scenario. Draws num_agents positions from the distribution, bins them into a grid and runs
+    up to num_queries sensor queries with random look directions (and, for a sensor mix, random sensor classes). The
+    sampled target count should agree with the analytic one within a few standard errors; a larger gap points at a
+    generator bug. The cell size defaults to the shortest view range.
+    """
+    rng = random.Random(random_seed)
+    mix = as_sensor_mix(sensor)
+    cell_size = cell_size if cell_size is not None else min(sensor_class.view_range for _, sensor_class in mix)
+    positions = [distribution.get_float3(rng) for _ in range(num_agents)]
+
+    # --- Bin the agents ---
+    grid: dict[tuple[int, int, int], list[Float3]] = dict()
+    for position in positions:
+        key = (math.floor(position.x / cell_size), math.floor(position.y / cell_size), math.floor(position.z / cell_size))
+        grid.setdefault(key, []).append(position)
+    histogram = Counter(len(cell) for cell in grid.values())
+
+    # --- Query a sample of sensors ---
+    sample = rng.sample(range(num_agents), min(num_queries, num_agents))
+    counts = []
+    total_candidates = 0
+    total_cells = 0
+    for index in sample:
+        query_sensor = mix[0][1] if len(mix) == 1 else rng.choices([s for _, s in mix], [f for f, _ in mix])[0]
+        reach = math.ceil(query_sensor.view_range / cell_size)
+        cos_half_fov = math.cos(math.radians(query_sensor.field_of_view / 2.0))
+        range_squared = query_sensor.view_range ** 2
+        origin = positions[index]
+        look = Float3.point_on_unit_sphere(rng)
+        cx, cy, cz = math.floor(origin.x / cell_size), math.floor(origin.y / cell_size), math.floor(origin.z / cell_size)
+        count = 0
+        for x in range(cx - reach, cx + reach + 1):
+            for y in range(cy - reach, cy + reach + 1):
+                for z in range(cz - reach, cz + reach + 1):
+                    total_cells += 1
+                    for target in grid.get((x, y, z), ()):
+                        total_candidates += 1
+                        if target is origin:
+                            continue
+                        offset = target - origin
+                        distance_squared = offset.dot(offset)
+                        if distance_squared <= range_squared and offset.dot(look) >= cos_half_fov * math.sqrt(distance_squared):
+                            count += 1
+        counts.append(count)
+
+    mean = sum(counts) / len(counts)
+    variance = sum((count - mean) ** 2 for count in counts) / max(1, len(counts) - 1)
+    return ScenarioEstimate(analytic_targets=expected_targets(distribution, num_agents, mix),
+                            sampled_targets=mean,
+                            sampled_targets_std=math.sqrt(variance),
+                            cell_size=cell_size,
+                            occupied_cells=len(grid),
+                            occupancy_histogram=dict(sorted(histogram.items())),
+                            mean_candidates_per_query=total_candidates / len(sample),
+                            mean_cells_per_query=total_cells / len(sample))
+
+
+def recommend_cell_size(distribution: SpatialDistribution, num_agents: int, sensor: SphericalSectorSensor | SensorMix,
+                        scales: tuple[float, ...] = (0.25, 0.5, 1.0, 2.0), cell_cost: float = 1.0,
+                        candidate_cost: float = 1.0, num_queries: int = 200) -> tuple[float, list[ScenarioEstimate]]:
+    """
+    Tries cell sizes of scale * (shortest) view_range and returns the one with the lowest modelled query cost
+    (cells visited * cell_cost + candidates tested * candidate_cost), together with the estimate for every scale.
+    """
+    view_range = min(sensor_class.view_range for _, sensor_class in as_sensor_mix(sensor))
+    estimates = [estimate_scenario(distribution, num_agents, sensor, view_range * scale, num_queries)
+                 for scale in scales]
+    best = min(estimates, key=lambda e: e.mean_cells_per_query * cell_cost + e.mean_candidates_per_query * candidate_cost)
+    return best.cell_size, estimates
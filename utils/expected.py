@@ -0,0 +1,23 @@
+import json
+import os
+from typing import Any
+
+
+def expected_path(scenario_path: str) -> str:
+    """ Returns the path of the reference results written next to a scenario file. """
+    return os.path.splitext(scenario_path)[0] + ".expected.json"
+
+
+def write_expected(scenario_path: str, **values: Any) -> None:
+    """ Writes reference results (e.g. result=<int>) next to a scenario so the harness can verify engine output. """
+    with open(expected_path(scenario_path), 'w') as file:
+        json.dump(values, file, indent=4)
+
+
+def read_expected(scenario_path: str) -> dict[str, Any] | None:
+    """ Reads the reference results of a scenario, or returns None when the generator did not write any. """
+    path = expected_path(scenario_path)
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        return json.load(file)
@@ -0,0 +1,83 @@
+from enum import StrEnum, auto
+from typing import Callable
+from geometry.aabb import AABB
+from geometry.float3 import Float3
+
+
+class SpatialOrder(StrEnum):
+    """ Order in which entities are laid out in a scenario file or an array. """
+    NONE = auto()
+    MORTON = auto()
+    HILBERT = auto()
+
+
+def morton_key(x: int, y: int, z: int, bits: int) -> int:
+    """ Z-order key of a grid cell: the bits of x, y and z interleaved, most significant level first. """
+    key = 0
+    for bit in range(bits - 1, -1, -1):
+        key = (key << 3) | (((x >> bit) & 1) << 2) | (((y >> bit) & 1) << 1) | ((z >> bit) & 1)
+    return key
+
+
+def hilbert_key(x: int, y: int, z: int, bits: int) -> int:
+    """
+    Hilbert curve key of a grid cell. Uses Skilling's transform ("Programming the Hilbert curve", 2004) to turn the
+    coordinates into the transposed Hilbert index, which is then interleaved like a Morton key. Consecutive keys are
+    always face-adjacent cells, unlike Morton keys, which jump at every power-of-two boundary.
+    """
+    axes = [x, y, z]
+    top = 1 << (bits - 1)
+
+    # --- Inverse undo ---
+    q = top
+    while q > 1:
+        p = q - 1
+        for i in range(3):
+            if axes[i] & q:
+                axes[0] ^= p
+            else:
+                t = (axes[0] ^ axes[i]) & p
+                axes[0] ^= t
+                axes[i] ^= t
+        q >>= 1
+
+    # --- Gray encode ---
+    axes[1] ^= axes[0]
+    axes[2] ^= axes[1]
+    t = 0
+    q = top
+    while q > 1:
+        if axes[2] & q:
+            t ^= q - 1
+        q >>= 1
+    return morton_key(axes[0] ^ t, axes[1] ^ t, axes[2] ^ t, bits)
+
+
+def spatial_sort[T](entities: list[T], order: SpatialOrder, bits: int = 10,
+                    position: Callable[[T], Float3] = lambda entity: entity.position) -> list[T]:
+    """
+    Returns the entities sorted along a space filling curve through their bounding box, quantized to 2^bits cells per
+    axis. Ties keep their input order, so the result only depends on the positions and the input order. With
+    SpatialOrder.NONE, a copy of the list is returned unchanged.
+    """
+    if order == SpatialOrder.NONE or len(entities) < 2:
+        return list(entities)
+    key_function = morton_key if order == SpatialOrder.MORTON else hilbert_key
+
+    bounds = AABB.empty()
+    for entity in entities:
+        bounds.expand_point(position(entity))
+    extent = bounds.dimensions()
+    cells = 1 << bits
+
+    def quantize(value: float, low: float, size: float) -> int:
+        """ Maps a coordinate to its cell along one axis. """
+        return min(cells - 1, int((value - low) / size * cells)) if size > 0 else 0
+
+    def key(entity: T) -> int:
+        """ Curve key of an entity's cell. """
+        p = position(entity)
+        return key_function(quantize(p.x, bounds.min_f3.x, extent.x), quantize(p.y, bounds.min_f3.y, extent.y),
+                            quantize(p.z, bounds.min_f3.z, extent.z), bits)
+
+    return sorted(entities, key=key)
@@ -0,0 +1,135 @@
+from dataclasses import dataclass
+from enum import StrEnum, auto
+from multiprocessing import Process
+from multiprocessing.connection import Connection, wait
+from typing import Callable
+
+
+class ProgressKind(StrEnum):
+    """ Kind of progress event. """
+    STARTED = auto()
+    ADVANCED = auto()
+    FINISHED = auto()
+    FAILED = auto()
+
+
+@dataclass
+class ProgressEvent:
+    """ A single progress report for a job. Completed and total count work items, e.g. objects generated. """
+    job: str
+    kind: ProgressKind
+    completed: int = 0
+    total: int = 0
+    message: str = ""
+
+
+type ProgressHandler = Callable[[ProgressEvent], None]
+
+
+class ProgressReporter:
+    """
+    Worker side of the progress layer. Events are handed to an emit callable, which is either a UI handler (same process)
+    or the send end of a pipe (child process). Calls to advance are cheap: an event is only emitted each time another
+    1/resolution of the total is completed. A reporter without an emit callable does nothing.
+    """
+    job: str
+    completed: int
+    total: int
+
+    def __init__(self, job: str, emit: ProgressHandler | None = None, resolution: int = 100) -> None:
+        self.job = job
+        self.completed = 0
+        self.total = 0
+        self._emit = emit
+        self._resolution = resolution
+        self._step = 1
+        self._next_emit = 1
+
+    @classmethod
+    def from_connection(cls, job: str, connection: Connection | None, resolution: int = 100) -> 'ProgressReporter':
+        """ Returns a reporter which sends its events through a pipe. A missing connection gives a silent reporter. """
+        return cls(job, connection.send if connection is not None else None, resolution)
+
+    def start(self, total: int = 0, message: str = "") -> None:
+        """ Reports that the job started and how many work items it has. """
+        self.completed = 0
+        self.total = total
+        self._step = max(1, total // self._resolution)
+        self._next_emit = self._step
+        self._send(ProgressKind.STARTED, message)
+
+    def advance(self, amount: int = 1) -> None:
+        """ Marks work items as done. Only emits when the next reporting step is crossed. """
+        self.completed += amount
+        if self.completed >= self._next_emit:
+            self._next_emit = self.completed + self._step
+            self._send(ProgressKind.ADVANCED)
+
+    def message(self, message: str) -> None:
+        """ Reports a phase change within the job, e.g. switching from generating to writing. """
+        self._send(ProgressKind.ADVANCED, message)
+
+    def finish(self, message: str = "") -> None:
+        """ Reports that the job is done. """
+        self._send(ProgressKind.FINISHED, message)
+
+    def fail(self, message: str = "") -> None:
+        """ Reports that the job failed. """
+        self._send(ProgressKind.FAILED, message)
+
+    def _send(self, kind: ProgressKind, message: str = "") -> None:
+        """ Emits an event if the reporter is connected to anything. """
+        if self._emit is not None:
+            self._emit(ProgressEvent(self.job, kind, self.completed, self.total, message))
+
+
+def watch_processes(workers: dict[str, tuple[Process, Connection]], handler: ProgressHandler) -> None:
+    """
+    Parent side of the progress layer. Blocks on the receiving pipe ends and the process sentinels of all workers and
+    hands every event to the handler, so the caller sleeps in the OS until something actually happens. When a process
+    exits without having reported FINISHED or FAILED, the matching event is synthesized from its exit code, carrying
+    the last progress the job reported so counts never move backwards.
+    The parent must have closed its copies of the sending pipe ends.
+    """
+    connections = {connection: job for job, (_, connection) in workers.items()}
+    sentinels = {process.sentinel: job for job, (process, _) in workers.items()}
+    done: set[str] = set()
+    last_reported: dict[str, ProgressEvent] = dict()
+
+    def receive(connection: Connection) -> bool:
+        """ Dispatches one event from the connection. Returns False once the pipe is closed. """
+        try:
+            event = connection.recv()
+        except EOFError:
+            return False
+        if event.kind in (ProgressKind.FINISHED, ProgressKind.FAILED):
+            done.add(event.job)
+        last_reported[event.job] = event
+        handler(event)
+        return True
+
+    while sentinels:
+        for ready in wait(list(connections) + list(sentinels)):
+            if ready in connections:
+                if not receive(ready):
+                    del connections[ready]
+                continue
+            if ready not in sentinels:
+                continue  # A pipe that was already drained when its process exited
+
+            # --- A process exited: drain what it sent before it died, then reap it ---
+            job = sentinels.pop(ready)
+            process, connection = workers[job]
+            if connection in connections:
+                while connection.poll() and receive(connection):
+                    pass
+                del connections[connection]
+            process.join()
+            if job in done:
+                continue
+            last = last_reported.get(job, ProgressEvent(job, ProgressKind.STARTED))
+            if process.exitcode != 0:
+                handler(ProgressEvent(job, ProgressKind.FAILED, last.completed, last.total,
+                                      f"exit code {process.exitcode}"))
+            else:
+                handler(ProgressEvent(job, ProgressKind.FINISHED, last.completed, last.total))
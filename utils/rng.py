@@ -0,0 +1,29 @@
+import random
+import zlib
+
+_MASK_64 = (1 << 64) - 1
+_GOLDEN_GAMMA = 0x9E3779B97F4A7C15
+
+
+def _mix_64(z: int) -> int:
+    """ The SplitMix64 finalizer. Maps a 64-bit integer to a well mixed 64-bit integer. """
+    z = (z + _GOLDEN_GAMMA) & _MASK_64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK_64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK_64
+    return z ^ (z >> 31)
+
+
+def derive_seed(random_seed: int, stream: str, index: int) -> int:
+    """
+    Derives the seed of entity `index` in the named stream (e.g. "agent" or "occluder") from the scenario seed. This is
+    a counter-based scheme: the result depends only on its arguments, never on how many numbers were drawn before, so
+    any entity can be (re)generated on its own, in any order and in any process.
+    """
+    z = _mix_64(random_seed & _MASK_64)
+    z = _mix_64(z ^ zlib.crc32(stream.encode()))
+    return _mix_64(z ^ (index & _MASK_64))
+
+
+def entity_rng(random_seed: int, stream: str, index: int) -> random.Random:
+    """ Returns an independent generator for entity `index` of the named stream. """
+    return random.Random(derive_seed(random_seed, stream, index))